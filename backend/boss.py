@@ -1,13 +1,12 @@
-import cv2
-from .utils import dist
+BOSS_CLEARANCE = 90
+BOSS_HIT_RADIUS = 70
 
-def update_boss(boss_pos, snake_pos):
+def update_boss(boss_pos, snake_pos, grid=None):
+    old = tuple(boss_pos)
     boss_pos[0] += (snake_pos[0] - boss_pos[0]) * 0.01
     boss_pos[1] += (snake_pos[1] - boss_pos[1]) * 0.01
+    if grid is not None:
+        grid.move(old, boss_pos, BOSS_CLEARANCE)
 
-def draw_boss(rgb, boss_pos, colors):
-    cv2.circle(rgb, (int(boss_pos[0]), int(boss_pos[1])), 60, colors["boss"], -1)
-    cv2.circle(rgb, (int(boss_pos[0]), int(boss_pos[1])), 80, colors["boss"], 3)
-
-def boss_hits_snake(boss_pos, snake_pos, threshold=70):
-    return dist(boss_pos, snake_pos) < threshold
+def draw_boss(scene, boss_pos, atlas):
+    atlas.add(scene, "boss", boss_pos[0], boss_pos[1])
@@ -0,0 +1,267 @@
+import os
+import sys
+import threading
+import time
+from collections import deque
+
+import cv2
+import numpy as np
+
+from .pipeline import LatestQueue
+
+# What the hand tracker needs: it detects on a ~320 px wide copy and crops
+# ROIs from the full frame, so anything past 640x480 is only resized away.
+CAPTURE_SIZE = (640, 480)
+CAPTURE_FPS = 30
+
+IMAGE_EXTS = (".jpg", ".jpeg", ".png", ".bmp")
+
+
+def default_api():
+    """Native OpenCV capture backend for this OS."""
+    if sys.platform.startswith("win"):
+        return cv2.CAP_DSHOW
+    if sys.platform == "darwin":
+        return cv2.CAP_AVFOUNDATION
+    if sys.platform.startswith("linux"):
+        return cv2.CAP_V4L2
+    return cv2.CAP_ANY
+
+
+# -----------------------------------------------------------
+# SOURCES
+# -----------------------------------------------------------
+# Every source has the subset of cv2.VideoCapture the game uses:
+# read(out=None) -> (ok, bgr_frame), isOpened(), release(), plus size and
+# fps. Like VideoCapture.read(image), read() decodes into `out` when given
+# one of the right size, and the frame then belongs to the caller.
+
+class DeviceSource:
+    """A camera, opened with the OS's native backend (falling back to any)
+    and asked for the size / fps the game needs instead of its default."""
+
+    def __init__(self, index=0, size=CAPTURE_SIZE, fps=CAPTURE_FPS, api=None):
+        api = default_api() if api is None else api
+        self.cap = cv2.VideoCapture(index, api)
+        if not self.cap.isOpened() and api != cv2.CAP_ANY:
+            self.cap = cv2.VideoCapture(index, cv2.CAP_ANY)
+        self.size = None
+        self.fps = None
+        if self.cap.isOpened():
+            self.negotiate(size, fps)
+
+    def negotiate(self, size, fps):
+        """Requests size / fps and records what the driver actually gave."""
+        cap = self.cap
+        # MJPG keeps USB bandwidth low enough for full fps on most webcams
+        cap.set(cv2.CAP_PROP_FOURCC, cv2.VideoWriter_fourcc(*"MJPG"))
+        cap.set(cv2.CAP_PROP_FRAME_WIDTH, size[0])
+        cap.set(cv2.CAP_PROP_FRAME_HEIGHT, size[1])
+        cap.set(cv2.CAP_PROP_FPS, fps)
+        # Don't let the driver queue frames up behind our back
+        cap.set(cv2.CAP_PROP_BUFFERSIZE, 1)
+        self.size = (int(cap.get(cv2.CAP_PROP_FRAME_WIDTH)),
+                     int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT)))
+        self.fps = cap.get(cv2.CAP_PROP_FPS) or fps
+        return self.size, self.fps
+
+    def read(self, out=None):
+        return self.cap.read(out)
+
+    def isOpened(self):
+        return self.cap.isOpened()
+
+    def release(self):
+        self.cap.release()
+
+
+class _PacedSource:
+    """Base for file-backed sources: hands frames out at `fps`, like a camera."""
+
+    def __init__(self, fps, realtime=True, loop=True):
+        self.fps = fps
+        self.realtime = realtime
+        self.loop = loop
+        self._next = None
+
+    def _wait_turn(self):
+        if not self.realtime or not self.fps:
+            return
+        now = time.monotonic()
+        if self._next is None:
+            self._next = now
+        elif now < self._next:
+            time.sleep(self._next - now)
+        self._next = max(self._next + 1.0 / self.fps, now - 1.0)
+
+
+class VideoFileSource(_PacedSource):
+    def __init__(self, path, realtime=True, loop=True):
+        self.cap = cv2.VideoCapture(path)
+        super().__init__(self.cap.get(cv2.CAP_PROP_FPS) or CAPTURE_FPS, realtime, loop)
+        self.size = (int(self.cap.get(cv2.CAP_PROP_FRAME_WIDTH)),
+                     int(self.cap.get(cv2.CAP_PROP_FRAME_HEIGHT)))
+
+    def read(self, out=None):
+        self._wait_turn()
+        ok, frame = self.cap.read(out)
+        if not ok and self.loop:
+            self.cap.set(cv2.CAP_PROP_POS_FRAMES, 0)
+            ok, frame = self.cap.read(out)
+        return ok, frame
+
+    def isOpened(self):
+        return self.cap.isOpened()
+
+    def release(self):
+        self.cap.release()
+
+
+class ImageDirSource(_PacedSource):
+    """Sorted image files from a directory, played as a video."""
+
+    def __init__(self, path, fps=CAPTURE_FPS, realtime=True, loop=True):
+        super().__init__(fps, realtime, loop)
+        self.files = sorted(os.path.join(path, f) for f in os.listdir(path)
+                            if f.lower().endswith(IMAGE_EXTS))
+        self._i = 0
+        first = cv2.imread(self.files[0]) if self.files else None
+        self.size = None if first is None else (first.shape[1], first.shape[0])
+
+    def read(self, out=None):
+        # (imread always allocates, so `out` is not used)
+        if self._i >= len(self.files):
+            if not self.loop or not self.files:
+                return False, None
+            self._i = 0
+        self._wait_turn()
+        frame = cv2.imread(self.files[self._i])
+        self._i += 1
+        return frame is not None, frame
+
+    def isOpened(self):
+        return bool(self.files)
+
+    def release(self):
+        self.files = []
+
+
+class SyntheticSource(_PacedSource):
+    """Generated frames: a bright disc circling a dark background.
+
+    Needs no hardware, so it stands in for the camera in demos and
+    benchmarks.
+    """
+
+    def __init__(self, size=CAPTURE_SIZE, fps=CAPTURE_FPS, realtime=True):
+        super().__init__(fps, realtime)
+        self.size = tuple(size)
+        self._n = 0
+        self._open = True
+
+    def read(self, out=None):
+        if not self._open:
+            return False, None
+        self._wait_turn()
+        w, h = self.size
+        a = self._n / max(self.fps, 1) * 1.5
+        self._n += 1
+        frame = out if out is not None and out.shape == (h, w, 3) else np.empty((h, w, 3), np.uint8)
+        frame[:] = (40, 30, 20)
+        center = (int(w / 2 + w / 3 * np.cos(a)), int(h / 2 + h / 3 * np.sin(a * 1.3)))
+        cv2.circle(frame, center, max(w // 20, 4), (150, 180, 230), -1)
+        return True, frame
+
+    def isOpened(self):
+        return self._open
+
+    def release(self):
+        self._open = False
+
+
+def open_source(spec=0, size=CAPTURE_SIZE, fps=CAPTURE_FPS, realtime=True):
+    """Opens a capture source from a spec.
+
+    int (or digit string) -> camera index, "synthetic" -> SyntheticSource,
+    a directory -> ImageDirSource, anything else -> VideoFileSource.
+    """
+    if isinstance(spec, int) or (isinstance(spec, str) and spec.isdigit()):
+        return DeviceSource(int(spec), size, fps)
+    if spec == "synthetic":
+        return SyntheticSource(size, fps, realtime)
+    if os.path.isdir(spec):
+        return ImageDirSource(spec, fps, realtime)
+    return VideoFileSource(spec, realtime)
+
+
+# -----------------------------------------------------------
+# LATEST-FRAME GRABBER
+# -----------------------------------------------------------
+class LatestFrameGrabber:
+    """Reads a source flat out in its own thread and keeps only the newest frame.
+
+    read() hands back a frame newer than the last one it returned, so a
+    slow consumer never sees a frame that sat in a buffer, and a fast
+    one waits for the next frame instead of getting a repeat.
+
+    The frame read() returns is the consumer's until its next read():
+    the source decodes into spare buffers only, and a buffer goes back
+    to the spares once the consumer has moved on from it or it was
+    replaced before anyone read it.
+    """
+
+    def __init__(self, source, timeout=1.0):
+        self.source = source
+        self.timeout = timeout
+        self.size = getattr(source, "size", None)
+        self.fps = getattr(source, "fps", None)
+        self.frames = LatestQueue()
+        self.error = None
+        self._seq = 0
+        self._spare = deque()  # buffers nobody holds; filled from both threads
+        self._held = None      # frame the consumer got from the last read()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="grabber", daemon=True)
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def _run(self):
+        try:
+            while not self._stop.is_set():
+                ok, frame = self.source.read(self._spare.popleft() if self._spare else None)
+                if not ok:
+                    self.error = RuntimeError("capture source stopped delivering frames")
+                    break
+                stale = self.frames.put(frame)
+                if stale is not None:
+                    self._spare.append(stale)
+        except Exception as exc:  # surfaced through read()
+            self.error = exc
+        finally:
+            self._stop.set()
+
+    def read(self):
+        seq, frame = self.frames.get(self._seq, self.timeout)
+        if frame is None:
+            return False, None
+        self._seq = seq
+        if self._held is not None:
+            self._spare.append(self._held)
+        self._held = frame
+        return True, frame
+
+    @property
+    def dropped(self):
+        """Frames the source delivered that nobody ever read."""
+        return self.frames.dropped
+
+    def isOpened(self):
+        return not self._stop.is_set() and self.source.isOpened()
+
+    def release(self):
+        self._stop.set()
+        if self._thread.is_alive():
+            self._thread.join(self.timeout)
+        self.source.release()
@@ -0,0 +1,26 @@
+import numpy as np
+
+# Reach of the snake's head against each kind of target (pixels)
+HEAD_RADIUS = 10
+PICKUP_RADIUS = 20
+
+
+def swept_hits(p0, p1, centers, radii):
+    """Which circles the segment p0 -> p1 passes within radius of.
+
+    centers is (n, 2), radii (n,); returns an (n,) bool array. A point
+    that didn't move (p0 == p1) is tested as a point. Use a radius of 0
+    for a slot that can never be hit.
+    """
+    x0, y0 = float(p0[0]), float(p0[1])
+    dx, dy = float(p1[0]) - x0, float(p1[1]) - y0
+    fx = centers[:, 0] - x0
+    fy = centers[:, 1] - y0
+
+    length2 = dx * dx + dy * dy
+    if length2 > 0:
+        # closest point on the segment to each centre
+        t = np.clip((fx * dx + fy * dy) / length2, 0.0, 1.0)
+        fx = fx - t * dx
+        fy = fy - t * dy
+    return fx * fx + fy * fy < radii * radii
@@ -0,0 +1,149 @@
+from collections import deque
+
+import cv2
+import numpy as np
+
+from .layers import get_static_layer
+from .render import build_scene
+
+# Dirty regions are tracked on a grid of TILE x TILE pixel cells
+TILE = 32
+# Past this much of the frame, a plain full redraw is cheaper
+FULL_REDRAW_AT = 0.5
+
+
+class Compositor:
+    """render() that only redraws the parts of a canvas that changed.
+
+    Each frame's Scene is compared with the previous one: sprites that
+    appeared, vanished or moved mark the tiles under their old and new
+    bounds dirty. Each patch of dirty tiles is restored from the static
+    layer and redrawn, clipped, with every sprite that overlaps it. When
+    that would touch most of the frame, or blit as many sprites as a
+    full redraw, the canvas is simply redrawn in full.
+
+    Canvases can rotate (the pipeline hands out a few so the stream can
+    still be encoding the last one): each canvas is brought up to date
+    with the changes of every frame since it was last drawn, and one not
+    drawn in the last `history` frames is redrawn in full.
+
+    After each render(), redrawn is the fraction of the canvas repainted
+    (mean_redrawn is its average over all frames so far) and dirty lists
+    the (x0, y0, x1, y1) rects where the frame can differ from the
+    previous one (None: anywhere), for StreamChannel.publish().
+    """
+
+    def __init__(self, tile=TILE, history=4):
+        self.tile = tile
+        self.frame = 0
+        self.redrawn = 1.0
+        self.redrawn_sum = 0.0
+        self.dirty = None
+        self._layer = None
+        self._prev = {}  # previous frame's scene item -> bounds
+        self._history = deque(maxlen=history)  # dirty tile mask per frame
+        self._canvases = {}  # id -> [canvas, frame drawn, touched rects]
+        self._touched = []
+
+    def render(self, rgb, state, theme_name=None, leaderboard=None):
+        theme_name = theme_name or state.theme_name
+        layer = get_static_layer(theme_name, state.width, state.height)
+        items = build_scene(state, theme_name, leaderboard).items
+        self.frame += 1
+
+        fresh = layer is not self._layer
+        if fresh:
+            # new theme or size: nothing drawn so far can be reused
+            self._layer = layer
+            self._prev = {}
+            self._history.clear()
+            self._canvases.clear()
+
+        bounds = [(x - s.cx, y - s.cy, x - s.cx + s.w, y - s.cy + s.h) for s, x, y in items]
+        current = dict(zip(items, bounds))
+        prev = self._prev
+        changed = [current[k] for k in current.keys() - prev.keys()]
+        changed += [prev[k] for k in prev.keys() - current.keys()]
+        self._prev = current
+        h, w = layer.shape[:2]
+        self._history.append(_cells(changed, self.tile, w, h))
+        # overlays drawn on the last frame are gone from this one
+        self.dirty = None if fresh else changed + self._touched
+        self._touched = []
+
+        entry = self._canvases.get(id(rgb))
+        age = None if entry is None or entry[0] is not rgb else self.frame - entry[1]
+        redrawn = None
+        if age is not None and age <= len(self._history) and rgb.shape == layer.shape:
+            cells = np.bitwise_or.reduce(list(self._history)[-age:])
+            if entry[2]:
+                cells |= _cells(entry[2], self.tile, w, h)
+            redrawn = self._redraw(rgb, layer, items, bounds, cells)
+        if redrawn is None:
+            np.copyto(rgb, layer)
+            for sprite, x, y in items:
+                sprite.blit(rgb, x, y)
+            redrawn = 1.0
+        self.redrawn = redrawn
+        self.redrawn_sum += redrawn
+
+        self._canvases[id(rgb)] = [rgb, self.frame, []]
+        # forget canvases that have left the rotation
+        oldest = self.frame - self._history.maxlen
+        for key in [k for k, e in self._canvases.items() if e[1] < oldest]:
+            del self._canvases[key]
+        return rgb
+
+    @property
+    def mean_redrawn(self):
+        return self.redrawn_sum / self.frame if self.frame else 0.0
+
+    def touch(self, rgb, rect):
+        """Marks (x0, y0, x1, y1) of rgb as drawn over outside the scene,
+        e.g. by an overlay, so it is repainted the next time rgb is used."""
+        rect = tuple(rect)
+        entry = self._canvases.get(id(rgb))
+        if entry is not None and entry[0] is rgb:
+            entry[2].append(rect)
+        if self.dirty is not None:
+            self.dirty.append(rect)
+        self._touched.append(rect)
+
+    def _redraw(self, rgb, layer, items, bounds, cells):
+        """Repaints the dirty tiles; returns the fraction of the frame
+        redrawn, or None if a full redraw would be cheaper."""
+        h, w = layer.shape[:2]
+        if not cells.any():
+            return 0.0
+        tile = self.tile
+        _, _, stats, _ = cv2.connectedComponentsWithStats(cells, connectivity=8)
+        # each 8-connected patch of tiles is redrawn as its bounding box
+        regions = [(cx * tile, cy * tile, min((cx + cw) * tile, w), min((cy + ch) * tile, h))
+                   for cx, cy, cw, ch, _ in stats[1:].tolist()]
+        area = sum((x1 - x0) * (y1 - y0) for x0, y0, x1, y1 in regions)
+        if area > FULL_REDRAW_AT * w * h:
+            return None
+
+        hits = [[k for k, (bx0, by0, bx1, by1) in enumerate(bounds)
+                 if bx0 < x1 and bx1 > x0 and by0 < y1 and by1 > y0]
+                for x0, y0, x1, y1 in regions]
+        if sum(map(len, hits)) >= len(items):
+            # as many (clipped) blits as a full redraw, plus the overhead
+            return None
+
+        for (x0, y0, x1, y1), hit in zip(regions, hits):
+            view = rgb[y0:y1, x0:x1]
+            np.copyto(view, layer[y0:y1, x0:x1])
+            for k in hit:
+                sprite, x, y = items[k]
+                sprite.blit(view, x - x0, y - y0)
+        return area / (w * h)
+
+
+def _cells(rects, tile, width, height):
+    """uint8 grid of the TILE cells any of the (x0, y0, x1, y1) rects touch."""
+    cells = np.zeros((-(-height // tile), -(-width // tile)), np.uint8)
+    for x0, y0, x1, y1 in rects:
+        cells[max(y0 // tile, 0):max(-(-y1 // tile), 0),
+              max(x0 // tile, 0):max(-(-x1 // tile), 0)] = 1
+    return cells
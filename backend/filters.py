@@ -0,0 +1,120 @@
+import math
+
+
+def _alpha(cutoff, dt):
+    tau = 1.0 / (2 * math.pi * cutoff)
+    return 1.0 / (1.0 + tau / dt)
+
+
+class OneEuroFilter:
+    """One-Euro filter on the fingertip with velocity-based prediction.
+
+    update() takes measurements stamped with their capture time; predict()
+    extrapolates the filtered position to any later time, which is how the
+    camera + inference latency is hidden. After max_coast seconds without
+    a measurement predict() gives up and returns None.
+    """
+
+    def __init__(self, min_cutoff=1.5, beta=0.05, d_cutoff=1.0, max_coast=0.25):
+        self.min_cutoff = min_cutoff
+        self.beta = beta
+        self.d_cutoff = d_cutoff
+        self.max_coast = max_coast
+        self.reset()
+
+    def reset(self):
+        self._t = None
+        self._x = None
+        self._v = (0.0, 0.0)
+
+    def update(self, t, point):
+        if self._t is None:
+            self._t, self._x, self._v = t, (float(point[0]), float(point[1])), (0.0, 0.0)
+            return
+        dt = t - self._t
+        if dt <= 0:
+            return  # same (or older) measurement seen again
+
+        raw_v = ((point[0] - self._x[0]) / dt, (point[1] - self._x[1]) / dt)
+        a_d = _alpha(self.d_cutoff, dt)
+        v = tuple(a_d * rv + (1 - a_d) * pv for rv, pv in zip(raw_v, self._v))
+
+        cutoff = self.min_cutoff + self.beta * math.hypot(*v)
+        a = _alpha(cutoff, dt)
+        self._x = tuple(a * p + (1 - a) * x for p, x in zip(point, self._x))
+        self._v = v
+        self._t = t
+
+    def predict(self, t):
+        if self._t is None or t - self._t > self.max_coast:
+            return None
+        lead = max(t - self._t, 0.0)
+        return (self._x[0] + self._v[0] * lead, self._x[1] + self._v[1] * lead)
+
+
+class KalmanFilter:
+    """Constant-velocity Kalman filter on the fingertip (x and y independent)."""
+
+    def __init__(self, process_noise=1e5, measurement_noise=9.0, max_coast=0.25):
+        self.q = process_noise        # acceleration variance, px^2/s^4
+        self.r = measurement_noise    # measurement variance, px^2
+        self.max_coast = max_coast
+        self.reset()
+
+    def reset(self):
+        self._t = None
+        # per axis: [pos, vel] and covariance [[pp, pv], [pv, vv]]
+        self._s = [[0.0, 0.0], [0.0, 0.0]]
+        self._p = [[0.0, 0.0, 0.0], [0.0, 0.0, 0.0]]
+
+    def update(self, t, point):
+        if self._t is None:
+            self._t = t
+            self._s = [[float(point[0]), 0.0], [float(point[1]), 0.0]]
+            self._p = [[self.r, 0.0, 1e6], [self.r, 0.0, 1e6]]
+            return
+        dt = t - self._t
+        if dt <= 0:
+            return
+
+        for axis in (0, 1):
+            x, v = self._s[axis]
+            pp, pv, vv = self._p[axis]
+
+            # predict
+            x += v * dt
+            q = self.q
+            pp += dt * (2 * pv + dt * vv) + q * dt ** 4 / 4
+            pv += dt * vv + q * dt ** 3 / 2
+            vv += q * dt ** 2
+
+            # correct
+            s = pp + self.r
+            k0, k1 = pp / s, pv / s
+            y = point[axis] - x
+            x += k0 * y
+            v += k1 * y
+            pp, pv, vv = (1 - k0) * pp, (1 - k0) * pv, vv - k1 * pv
+
+            self._s[axis] = [x, v]
+            self._p[axis] = [pp, pv, vv]
+        self._t = t
+
+    def predict(self, t):
+        if self._t is None or t - self._t > self.max_coast:
+            return None
+        lead = max(t - self._t, 0.0)
+        return tuple(x + v * lead for x, v in self._s)
+
+
+FILTERS = {
+    "one_euro": OneEuroFilter,
+    "kalman": KalmanFilter,
+}
+
+
+def make_filter(kind, **kwargs):
+    """Input filter by name ("one_euro", "kalman"), or None for "none"."""
+    if kind in (None, "none"):
+        return None
+    return FILTERS[kind](**kwargs)
@@ -1,36 +1,42 @@
-import cv2
 import random
-from .utils import dist, random_pos
-
-def spawn_food(snake_body, width, height):
-    while True:
-        x, y = random_pos(width, height)
-        if all(dist([x, y], block) > 25 for block in snake_body):
-            kind = "gold" if random.random() < 0.2 else "normal"
-            return [x, y], kind
-
-def draw_food(rgb, food_pos, food_kind, colors):
-    col = colors["food_gold"] if food_kind == "gold" else colors["food_normal"]
-    cv2.circle(rgb, (int(food_pos[0]), int(food_pos[1])), 10, col, -1)
-
-def maybe_spawn_blue(blue_food_pos, width, height):
-    if blue_food_pos is None and random.random() < 0.01:
-        x, y = random_pos(width, height)
-        return [x, y]
+
+from .state import FOOD_RADIUS
+
+# Food and power-ups hold their cells on the grid, so nothing else spawns
+# on top of them; whoever picks one up removes it again.
+
+def _spawn(grid, rng):
+    pos = grid.sample_free(rng)
+    if pos is not None:
+        grid.add(pos, FOOD_RADIUS)
+    return pos
+
+def spawn_food(grid, rng=random):
+    """New food on a free cell; (None, None) once the board is full."""
+    pos = _spawn(grid, rng)
+    if pos is None:
+        return None, None
+    kind = "gold" if rng.random() < 0.2 else "normal"
+    return pos, kind
+
+def draw_food(scene, food_pos, food_kind, atlas):
+    name = "food_gold" if food_kind == "gold" else "food_normal"
+    atlas.add(scene, name, food_pos[0], food_pos[1])
+
+def maybe_spawn_blue(blue_food_pos, grid, rng=random):
+    if blue_food_pos is None and rng.random() < 0.01:
+        return _spawn(grid, rng)
     return blue_food_pos
 
-def draw_blue_food(rgb, blue_food_pos):
-    if blue_food_pos:
-        cv2.circle(rgb, (int(blue_food_pos[0]), int(blue_food_pos[1])),
-                   10, (0, 128, 255), -1)
+def draw_blue_food(scene, blue_food_pos, atlas):
+    if blue_food_pos is not None:
+        atlas.add(scene, "blue_food", blue_food_pos[0], blue_food_pos[1])
 
-def maybe_spawn_invisible(invisible_pos, width, height):
-    if invisible_pos is None and random.random() < 0.005:
-        x, y = random_pos(width, height)
-        return [x, y]
+def maybe_spawn_invisible(invisible_pos, grid, rng=random):
+    if invisible_pos is None and rng.random() < 0.005:
+        return _spawn(grid, rng)
     return invisible_pos
 
-def draw_invisible(rgb, invisible_pos):
-    if invisible_pos:
-        cv2.circle(rgb, (int(invisible_pos[0]), int(invisible_pos[1])),
-                   10, (255, 255, 255), 2)
+def draw_invisible(scene, invisible_pos, atlas):
+    if invisible_pos is not None:
+        atlas.add(scene, "invisible", invisible_pos[0], invisible_pos[1])
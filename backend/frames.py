@@ -0,0 +1,53 @@
+from collections import deque
+
+import cv2
+import numpy as np
+
+
+class FramePrep:
+    """Camera frame -> model input in one pass, into reused buffers.
+
+    The camera frame is resized straight into a model-sized buffer; the
+    mirror and the BGR->RGB swap then run in place on that small buffer,
+    so the full-size frame is never flipped, converted or copied.
+
+    Outputs come from a pool of preallocated buffers and belong to the
+    caller until it hands them back with release(); the pool only grows
+    when every buffer is still out, so a consumer that never releases
+    just gets a fresh buffer per frame. GamePipeline and GameServer pass
+    each frame along and release it once it is dropped or replaced.
+    """
+
+    def __init__(self, size, mirror=True, rgb=True, depth=4):
+        self.size = tuple(size)
+        self.mirror = mirror
+        self.rgb = rgb
+        w, h = self.size
+        # deque: release() may come from other threads than __call__()
+        self._free = deque(np.empty((h, w, 3), np.uint8) for _ in range(depth))
+
+    def release(self, frame):
+        """Returns a frame from __call__() to the pool."""
+        self._free.append(frame)
+
+    def __call__(self, frame):
+        try:
+            dst = self._free.popleft()
+        except IndexError:
+            w, h = self.size
+            dst = np.empty((h, w, 3), np.uint8)
+
+        h, w = frame.shape[:2]
+        if (w, h) == self.size:
+            if self.mirror:
+                cv2.flip(frame, 1, dst=dst)
+            else:
+                np.copyto(dst, frame)
+        else:
+            # (a single mirrored warpAffine was measured slower than this)
+            cv2.resize(frame, self.size, dst=dst, interpolation=cv2.INTER_LINEAR)
+            if self.mirror:
+                cv2.flip(dst, 1, dst=dst)
+        if self.rgb:
+            cv2.cvtColor(dst, cv2.COLOR_BGR2RGB, dst=dst)
+        return dst
@@ -0,0 +1,101 @@
+import numpy as np
+
+
+class OccupancyGrid:
+    """Coarse occupancy counts over the board, kept up to date incrementally.
+
+    Entities add() themselves with a clearance radius and remove() or move()
+    as they change, so finding a free spot never has to scan the entities.
+    """
+
+    def __init__(self, width, height, cell=20, margin=20):
+        self.width = width
+        self.height = height
+        self.cell = cell
+        self.cols = -(-width // cell)
+        self.rows = -(-height // cell)
+        self.counts = np.zeros((self.rows, self.cols), np.int32)
+
+        # Only cells fully inside the margin may ever be handed out
+        xs = np.arange(self.cols) * cell
+        ys = np.arange(self.rows) * cell
+        ok_x = (xs >= margin) & (xs + cell <= width - margin)
+        ok_y = (ys >= margin) & (ys + cell <= height - margin)
+        self.spawnable = ok_y[:, None] & ok_x[None, :]
+
+    def clear(self):
+        self.counts[:] = 0
+
+    def _span(self, pos, radius):
+        c = self.cell
+        x, y, radius = float(pos[0]), float(pos[1]), float(radius)
+        x0 = max(int((x - radius) // c), 0)
+        y0 = max(int((y - radius) // c), 0)
+        x1 = min(int((x + radius) // c) + 1, self.cols)
+        y1 = min(int((y + radius) // c) + 1, self.rows)
+        return y0, y1, x0, x1
+
+    def add(self, pos, radius):
+        y0, y1, x0, x1 = self._span(pos, radius)
+        self.counts[y0:y1, x0:x1] += 1
+
+    def remove(self, pos, radius):
+        y0, y1, x0, x1 = self._span(pos, radius)
+        self.counts[y0:y1, x0:x1] -= 1
+
+    def move(self, old, new, radius):
+        a = self._span(old, radius)
+        b = self._span(new, radius)
+        if a != b:
+            self.counts[a[0]:a[1], a[2]:a[3]] -= 1
+            self.counts[b[0]:b[1], b[2]:b[3]] += 1
+
+    def move_many(self, old, new, radii):
+        """Vectorized move() for (n, 2) old / new positions and (n,) radii."""
+        reach = np.asarray(radii, np.float64)[:, None]
+        c = self.cell
+        # A span only changes when one of its edges crosses a cell line
+        changed = np.flatnonzero(
+            (np.floor((old - reach) / c) != np.floor((new - reach) / c)).any(axis=1)
+            | (np.floor((old + reach) / c) != np.floor((new + reach) / c)).any(axis=1))
+        if len(changed) <= 8:
+            for i in changed.tolist():
+                self.move(old[i], new[i], reach[i, 0])
+            return
+
+        # Many at once: -1 / +1 rectangles summed through a 2D difference
+        # array, one pass over the board instead of one slice per entity.
+        a = self._spans(old[changed], reach[changed, 0])
+        b = self._spans(new[changed], reach[changed, 0])
+        diff = np.zeros((self.rows + 1, self.cols + 1), np.int32)
+        for spans, sign in ((a, -1), (b, 1)):
+            y0, y1, x0, x1 = spans.T
+            np.add.at(diff, (y0, x0), sign)
+            np.add.at(diff, (y0, x1), -sign)
+            np.add.at(diff, (y1, x0), -sign)
+            np.add.at(diff, (y1, x1), sign)
+        self.counts += diff.cumsum(0).cumsum(1)[:-1, :-1]
+
+    def _spans(self, pos, radii):
+        # (n, 4) rows of y0, y1, x0, x1 -- the same cells as _span()
+        c = self.cell
+        x, y = pos[:, 0], pos[:, 1]
+        return np.stack([
+            np.clip(np.floor((y - radii) / c), 0, None),
+            np.clip(np.floor((y + radii) / c) + 1, None, self.rows),
+            np.clip(np.floor((x - radii) / c), 0, None),
+            np.clip(np.floor((x + radii) / c) + 1, None, self.cols),
+        ], axis=1).astype(np.intp)
+
+    def free_count(self):
+        return int(np.count_nonzero(self.spawnable & (self.counts == 0)))
+
+    def sample_free(self, rng):
+        """Uniformly random point in a free cell, or None if the board is full."""
+        free = np.flatnonzero(self.spawnable & (self.counts == 0))
+        if len(free) == 0:
+            return None
+        row, col = divmod(int(free[rng.randrange(len(free))]), self.cols)
+        x = col * self.cell + rng.randrange(self.cell)
+        y = row * self.cell + rng.randrange(self.cell)
+        return [x, y]
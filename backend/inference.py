@@ -0,0 +1,150 @@
+import multiprocessing
+import threading
+from concurrent.futures import Future
+from multiprocessing.shared_memory import SharedMemory
+
+import numpy as np
+
+from .tracking import Landmark, HandLandmarks, HandResults
+
+# HandTracker feeds the model moving crops, so MediaPipe's own cross-frame
+# tracking would carry over an ROI from different image coordinates
+HANDS_DEFAULTS = {
+    "static_image_mode": True,
+    "max_num_hands": 1,
+    "min_detection_confidence": 0.7,
+}
+
+
+def _worker(shm_name, slot_bytes, tasks, results, hands_kwargs):
+    import mediapipe as mp
+
+    shm = SharedMemory(name=shm_name)
+    hands = mp.solutions.hands.Hands(**hands_kwargs)
+    try:
+        while True:
+            task = tasks.get()
+            if task is None:
+                break
+            slot, seq, shape = task
+            frame = np.ndarray(shape, np.uint8, buffer=shm.buf, offset=slot * slot_bytes)
+            res = hands.process(frame)
+            # Only the landmarks travel back, never the pixels
+            out = [[(lm.x, lm.y, lm.z) for lm in hand.landmark]
+                   for hand in (res.multi_hand_landmarks or [])]
+            del frame
+            results.put((slot, seq, out))
+    finally:
+        hands.close()
+        shm.close()
+
+
+class InferenceService:
+    """MediaPipe Hands running in worker processes.
+
+    Frames are copied into shared-memory ring slots, so no pixels are
+    pickled; only the 21 landmarks per hand come back. There are `slots`
+    frames in flight at most: submit() returns None (or blocks) when they
+    are all taken. process() is a blocking drop-in for hands.process() and
+    may be called from several threads at once.
+
+    Workers run in static image mode by default and keep no state between
+    frames, so frames may go to any worker. Pass
+    hands_kwargs={"static_image_mode": False} only when full frames are fed
+    without a HandTracker, and then run one video stream through one
+    worker (workers=1).
+    """
+
+    def __init__(self, max_shape=(720, 1280, 3), workers=1, slots=None, hands_kwargs=None):
+        self.workers = workers
+        self.slots = slots or 2 * workers
+        self.slot_bytes = int(np.prod(max_shape))
+        self.dropped = 0
+
+        self._shm = SharedMemory(create=True, size=self.slots * self.slot_bytes)
+        self._free = list(range(self.slots))
+        self._slot_ready = threading.Condition()
+        self._pending = {}
+        self._seq = 0
+
+        ctx = multiprocessing.get_context("spawn")
+        self._tasks = ctx.Queue()
+        self._results = ctx.Queue()
+        kwargs = dict(HANDS_DEFAULTS, **(hands_kwargs or {}))
+        self._procs = [
+            ctx.Process(target=_worker, name=f"hands-{i}", daemon=True,
+                        args=(self._shm.name, self.slot_bytes, self._tasks, self._results, kwargs))
+            for i in range(workers)
+        ]
+        for p in self._procs:
+            p.start()
+
+        self._closed = False
+        self._collector = threading.Thread(target=self._collect, name="hands-results", daemon=True)
+        self._collector.start()
+
+    def submit(self, rgb, block=False, timeout=None):
+        """Queues a frame; returns a Future of HandResults, or None if full."""
+        if rgb.nbytes > self.slot_bytes:
+            raise ValueError(f"frame {rgb.shape} larger than the {self.slot_bytes}-byte slots")
+
+        with self._slot_ready:
+            if not self._free and block:
+                self._slot_ready.wait_for(lambda: self._free or self._closed, timeout)
+            if not self._free or self._closed:
+                self.dropped += 1
+                return None
+            slot = self._free.pop()
+            self._seq += 1
+            seq = self._seq
+            fut = Future()
+            self._pending[seq] = fut
+
+        view = np.ndarray(rgb.shape, np.uint8, buffer=self._shm.buf, offset=slot * self.slot_bytes)
+        np.copyto(view, rgb)
+        self._tasks.put((slot, seq, rgb.shape))
+        return fut
+
+    def process(self, rgb, timeout=5.0):
+        fut = self.submit(rgb, block=True, timeout=timeout)
+        if fut is None:
+            raise RuntimeError("inference service is closed or stalled")
+        return fut.result(timeout)
+
+    @property
+    def alive(self):
+        return not self._closed and all(p.is_alive() for p in self._procs)
+
+    def _collect(self):
+        while True:
+            item = self._results.get()
+            if item is None:
+                return
+            slot, seq, hands = item
+            with self._slot_ready:
+                self._free.append(slot)
+                fut = self._pending.pop(seq, None)
+                self._slot_ready.notify()
+            if fut is not None:
+                fut.set_result(HandResults([
+                    HandLandmarks([Landmark(*lm) for lm in hand]) for hand in hands
+                ]))
+
+    def close(self):
+        if self._closed:
+            return
+        with self._slot_ready:
+            self._closed = True
+            self._slot_ready.notify_all()
+        for _ in self._procs:
+            self._tasks.put(None)
+        for p in self._procs:
+            p.join(2.0)
+            if p.is_alive():
+                p.terminate()
+        self._results.put(None)
+        self._collector.join(1.0)
+        for fut in self._pending.values():
+            fut.cancel()
+        self._shm.close()
+        self._shm.unlink()
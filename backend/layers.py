@@ -0,0 +1,45 @@
+import threading
+from collections import OrderedDict
+
+import cv2
+import numpy as np
+
+from .theme import get_theme_colors
+
+# Kiosks switch themes and resolutions; keep only the most recent layers.
+MAX_LAYERS = 8
+
+_layers = OrderedDict()
+_lock = threading.Lock()
+
+
+def _draw_static_layer(theme_name, width, height):
+    colors = get_theme_colors(theme_name)
+    layer = np.empty((height, width, 3), np.uint8)
+    cv2.rectangle(layer, (0, 0), (width, height), colors["bg"], -1)
+    cv2.rectangle(layer, (5, 5), (width - 5, height - 5), colors["wall"], 3)
+    layer.flags.writeable = False
+    return layer
+
+
+def get_static_layer(theme_name, width, height):
+    """Pre-rendered background + wall border, shared and read-only."""
+    key = (theme_name, width, height)
+    with _lock:
+        layer = _layers.get(key)
+        if layer is not None:
+            _layers.move_to_end(key)
+            return layer
+
+    layer = _draw_static_layer(theme_name, width, height)
+
+    with _lock:
+        _layers[key] = layer
+        while len(_layers) > MAX_LAYERS:
+            _layers.popitem(last=False)
+    return layer
+
+
+def clear_layers():
+    with _lock:
+        _layers.clear()
@@ -1,23 +1,178 @@
-import cv2
+import math
 
-def update_obstacles(obstacles, velocities, width, height):
+import numpy as np
 
-    for i, obs in enumerate(obstacles):
-        ox, oy, r = obs
-        vx, vy = velocities[i]
+from .sprites import OBSTACLE_COLOR
 
-        ox += vx
-        oy += vy
+OBSTACLE_RADIUS = 25
+BASE_SPEED = 2 * math.sqrt(2)  # pixels per tick at level 1
+MAX_OBSTACLES = 40
+# Below this many obstacles every pair is tested; above, only pairs that
+# share or neighbour a spatial-hash cell.
+BRUTE_FORCE_PAIRS = 16
+_HALF_NEIGHBOURS = ((0, 0), (1, -1), (1, 0), (1, 1), (0, 1))
+_ALL_PAIRS = {}
 
-        if ox < r or ox > width - r:
-            vx *= -1
-        if oy < r or oy > height - r:
-            vy *= -1
 
-        obstacles[i] = [ox, oy, r]
-        velocities[i] = [vx, vy]
+def obstacle_count(level):
+    return min(3 + (level - 1) // 2, MAX_OBSTACLES)
 
 
-def draw_obstacles(rgb, obstacles):
-    for ox, oy, r in obstacles:
-        cv2.circle(rgb, (int(ox), int(oy)), r, (140, 140, 140), -1)
+def obstacle_speed(level):
+    return BASE_SPEED * min(1.0 + 0.08 * (level - 1), 2.0)
+
+
+# -----------------------------------------------------------
+# LEVEL SCALING
+# -----------------------------------------------------------
+def set_speed(velocities, speed):
+    """Rescales every (n, 2) velocity to `speed`, keeping directions."""
+    norms = np.hypot(velocities[:, 0], velocities[:, 1])
+    velocities *= (speed / np.maximum(norms, 1e-9))[:, None]
+
+
+def add_obstacles(obstacles, velocities, count, speed, width, height, rng,
+                  grid=None, clearance=10, avoid=None, min_gap=120):
+    """Returns (obstacles, velocities) grown to `count` rows.
+
+    New obstacles start on free grid cells (when a grid is given), at
+    least min_gap away from `avoid`, heading in a random direction.
+    """
+    rows, vels = [], []
+    r = OBSTACLE_RADIUS
+    for _ in range(count - len(obstacles)):
+        for _attempt in range(10):
+            if grid is not None:
+                pos = grid.sample_free(rng)
+                if pos is None:
+                    break
+            else:
+                pos = [rng.uniform(r, width - r), rng.uniform(r, height - r)]
+            x = min(max(pos[0], r), width - r)
+            y = min(max(pos[1], r), height - r)
+            if avoid is None or math.hypot(x - avoid[0], y - avoid[1]) >= min_gap:
+                break
+        else:
+            continue
+        if pos is None:
+            break
+        a = rng.uniform(0, 2 * math.pi)
+        rows.append((x, y, r))
+        vels.append((speed * math.cos(a), speed * math.sin(a)))
+        if grid is not None:
+            grid.add((x, y), r + clearance)
+
+    if not rows:
+        return obstacles, velocities
+    return (np.vstack([obstacles, np.array(rows, np.float64)]),
+            np.vstack([velocities, np.array(vels, np.float64)]))
+
+
+# -----------------------------------------------------------
+# PHYSICS
+# -----------------------------------------------------------
+def update_obstacles(obstacles, velocities, width, height, grid=None, clearance=10):
+    """Moves (n, 3) obstacles [x, y, r] by (n, 2) velocities in place.
+
+    Obstacles bounce off each other (equal-mass elastic) and off the walls.
+    """
+    pos = obstacles[:, :2]
+    radii = obstacles[:, 2]
+    old = pos.copy() if grid is not None else None
+
+    pos += velocities
+    collide_obstacles(pos, velocities, radii)
+
+    # walls: clamp back inside and point the velocity away from the wall
+    r = radii[:, None]
+    upper = np.subtract((width, height), r)
+    low = pos < r
+    high = pos > upper
+    if low.any() or high.any():
+        velocities[low] = np.abs(velocities[low])
+        velocities[high] = -np.abs(velocities[high])
+        np.clip(pos, r, upper, out=pos)
+
+    if grid is not None:
+        grid.move_many(old, pos, radii + clearance)
+
+
+def collide_obstacles(pos, velocities, radii):
+    """Separates overlapping circles and exchanges their normal velocities.
+
+    Speeds are kept as they were: several simultaneous contacts would
+    otherwise pump energy in, and obstacle speed is set by the level.
+    """
+    i, j = _candidate_pairs(pos, radii)
+    if len(i) == 0:
+        return
+    delta = pos[j] - pos[i]
+    d = np.hypot(delta[:, 0], delta[:, 1])
+    hit = d < radii[i] + radii[j]
+    if not hit.any():
+        return
+    i, j, delta, d = i[hit], j[hit], delta[hit], d[hit]
+    speed = np.hypot(velocities[:, 0], velocities[:, 1])
+
+    normal = delta / np.maximum(d, 1e-9)[:, None]
+    overlap = (radii[i] + radii[j] - d)[:, None] * 0.5
+    np.add.at(pos, i, -normal * overlap)
+    np.add.at(pos, j, normal * overlap)
+
+    # only pairs still closing get their normal components swapped
+    closing = np.einsum("ij,ij->i", velocities[i] - velocities[j], normal)
+    impulse = normal * np.maximum(closing, 0.0)[:, None]
+    np.add.at(velocities, i, -impulse)
+    np.add.at(velocities, j, impulse)
+    set_speed(velocities, speed)
+
+
+def _candidate_pairs(pos, radii):
+    n = len(pos)
+    if n < 2:
+        empty = np.empty(0, np.intp)
+        return empty, empty
+    if n <= BRUTE_FORCE_PAIRS:
+        pairs = _ALL_PAIRS.get(n)
+        if pairs is None:
+            pairs = _ALL_PAIRS[n] = np.triu_indices(n, 1)
+        return pairs
+
+    # Spatial hash with cells as wide as the largest diameter: touching
+    # circles are always in the same or adjacent cells, and visiting half
+    # of the neighbourhood lists every pair once.
+    cells = np.floor(pos / (2 * radii.max())).astype(np.int64)
+    cx, cy = cells[:, 0], cells[:, 1]
+    keys = (cx << 32) + cy
+    order = np.argsort(keys, kind="stable")
+    sorted_keys = keys[order]
+    idx = np.arange(n)
+
+    pairs_i, pairs_j = [], []
+    for dx, dy in _HALF_NEIGHBOURS:
+        target = ((cx + dx) << 32) + (cy + dy)
+        lo = np.searchsorted(sorted_keys, target, "left")
+        hi = np.searchsorted(sorted_keys, target, "right")
+        count = hi - lo
+        total = int(count.sum())
+        if total == 0:
+            continue
+        # expand each i's [lo, hi) range of sorted positions into pairs
+        i = np.repeat(idx, count)
+        offset = np.arange(total) - np.repeat(np.cumsum(count) - count, count)
+        j = order[np.repeat(lo, count) + offset]
+        if dx == 0 and dy == 0:
+            keep = i < j
+            i, j = i[keep], j[keep]
+        pairs_i.append(i)
+        pairs_j.append(j)
+
+    if not pairs_i:
+        empty = np.empty(0, np.intp)
+        return empty, empty
+    return np.concatenate(pairs_i), np.concatenate(pairs_j)
+
+
+def draw_obstacles(scene, obstacles, atlas):
+    for ox, oy, r in obstacles.tolist():
+        scene.add(atlas.circle(r, OBSTACLE_COLOR), ox, oy)
@@ -0,0 +1,117 @@
+import time
+from collections import deque
+
+# Cheapest-last quality steps. The camera preview goes first, then the
+# hand model's input size, then the particle trail.
+QUALITY_LEVELS = (
+    {"preview_fps": 10, "detect_width": 320, "particles": 1.0},
+    {"preview_fps": 5, "detect_width": 320, "particles": 1.0},
+    {"preview_fps": 5, "detect_width": 256, "particles": 1.0},
+    {"preview_fps": 2, "detect_width": 192, "particles": 1.0},
+    {"preview_fps": 2, "detect_width": 192, "particles": 0.5},
+    {"preview_fps": 2, "detect_width": 160, "particles": 0.0},
+)
+
+
+class FramePacer:
+    """Schedules ticks against absolute monotonic deadlines.
+
+    Each deadline is the previous one plus the tick's period, so the time
+    spent working comes out of the sleep instead of being added to it and
+    the tick rate does not depend on how fast the machine is. A tick that
+    finishes after its deadline is counted as missed; one more than max_lag
+    behind re-bases the schedule on now rather than bursting to catch up.
+    """
+
+    def __init__(self, max_lag=0.1, clock=time.monotonic):
+        self.max_lag = max_lag
+        self.clock = clock
+        self.deadline = None
+        self.ticks = 0
+        self.missed = 0
+        self.load = 0.0     # smoothed busy time / period
+        self._started = None
+
+    def begin(self):
+        """Marks the start of a tick's work."""
+        self._started = self.clock()
+        if self.deadline is None:
+            self.deadline = self._started
+
+    def end(self, period):
+        """Closes the tick; returns the slack (seconds) until the next deadline.
+
+        Negative slack means the deadline was missed by that much.
+        """
+        now = self.clock()
+        busy = now - (now if self._started is None else self._started)
+        if self.deadline is None:
+            self.deadline = now
+        self.deadline += period
+        slack = self.deadline - now
+
+        self.ticks += 1
+        if slack < 0:
+            self.missed += 1
+            if -slack > self.max_lag:
+                self.deadline = now
+        if period > 0:
+            self.load += 0.1 * (busy / period - self.load)
+        return slack
+
+    def reset(self):
+        self.deadline = None
+        self._started = None
+
+
+class QualityGovernor:
+    """Steps quality down while deadlines are missed and back up with headroom.
+
+    apply(settings) is called with an entry of `levels` whenever the level
+    changes (and once up front). Degrading reacts to a window of ticks with
+    too many misses; restoring needs a whole window with no misses and low
+    load, and `cooldown` seconds since the last change, so it does not
+    flap between two levels.
+    """
+
+    def __init__(self, apply, levels=QUALITY_LEVELS, window=30, degrade_at=0.2,
+                 restore_below=0.6, cooldown=3.0, clock=time.monotonic):
+        self.apply = apply
+        self.levels = levels
+        self.degrade_at = degrade_at
+        self.restore_below = restore_below
+        self.cooldown = cooldown
+        self.clock = clock
+        self.level = 0
+        self.changes = 0
+        self._misses = deque(maxlen=window)
+        self._loads = deque(maxlen=window)
+        self._changed_at = clock()
+        apply(levels[0])
+
+    @property
+    def settings(self):
+        return self.levels[self.level]
+
+    def observe(self, slack, load):
+        """Feeds one tick's slack (from FramePacer) and busy fraction."""
+        self._misses.append(slack < 0)
+        self._loads.append(load)
+        if len(self._misses) < self._misses.maxlen:
+            return
+
+        miss_rate = sum(self._misses) / len(self._misses)
+        if miss_rate > self.degrade_at and self.level < len(self.levels) - 1:
+            self._set(self.level + 1)
+        elif (self.level > 0 and miss_rate == 0
+              and max(self._loads) < self.restore_below
+              and self.clock() - self._changed_at >= self.cooldown):
+            self._set(self.level - 1)
+
+    def _set(self, level):
+        self.level = level
+        self.changes += 1
+        self._changed_at = self.clock()
+        self._misses.clear()
+        self._loads.clear()
+        self.apply(self.levels[level])
@@ -0,0 +1,92 @@
+import numpy as np
+
+from .theme import get_theme_colors
+
+# Per-theme trail effects. color is a key into the theme palette.
+PARTICLE_PRESETS = {
+    "default": {"max_count": 32, "emit_every": 1, "radius": 15, "decay": 1.0, "color": "particle"},
+    "Fire": {"max_count": 48, "emit_every": 1, "radius": 18, "decay": 1.5, "color": "particle"},
+    "Ice": {"max_count": 48, "emit_every": 2, "radius": 12, "decay": 0.5, "color": "particle"},
+    "Forest": {"max_count": 24, "emit_every": 2, "radius": 15, "decay": 1.0, "color": "particle"},
+}
+
+
+class ParticlePool:
+    """Fixed-capacity particle storage with vectorized aging.
+
+    Live particles are always packed at the front of the arrays, oldest
+    first, so nothing is allocated once the pool is built.
+    """
+
+    def __init__(self, max_count=32, emit_every=1, radius=15, decay=1.0,
+                 color=(255, 255, 255)):
+        self.capacity = max_count
+        self.limit = max_count  # lowered by the quality governor
+        self.emit_every = max(int(emit_every), 1)
+        self.radius = float(radius)
+        self.decay = float(decay)
+        self.color = tuple(color)
+
+        self.pos = np.zeros((max_count, 2), np.float32)
+        self.radii = np.zeros(max_count, np.float32)
+        self.life = np.zeros(max_count, np.int32)
+        self.colors = np.zeros((max_count, 3), np.uint8)
+        self.count = 0
+        self._ticks = 0
+
+    @classmethod
+    def from_preset(cls, theme_name):
+        preset = PARTICLE_PRESETS.get(theme_name, PARTICLE_PRESETS["default"])
+        colors = get_theme_colors(theme_name)
+        return cls(preset["max_count"], preset["emit_every"], preset["radius"],
+                   preset["decay"], colors[preset["color"]])
+
+    def __len__(self):
+        return self.count
+
+    def set_limit(self, fraction):
+        """Caps live particles at a fraction of capacity; extras fade out."""
+        self.limit = int(self.capacity * min(max(fraction, 0.0), 1.0))
+
+    def clear(self):
+        self.count = 0
+        self._ticks = 0
+
+    def emit(self, x, y):
+        if self.count >= self.limit:
+            return False
+        i = self.count
+        self.pos[i] = (x, y)
+        self.radii[i] = self.radius
+        self.life[i] = 0
+        self.colors[i] = self.color
+        self.count += 1
+        return True
+
+    def step(self, source=None):
+        """Ages every particle by one tick, then emits at source (x, y)."""
+        n = self.count
+        if n:
+            self.radii[:n] -= self.decay
+            self.life[:n] += 1
+            keep = self.radii[:n] >= 1
+            if not keep.all():
+                alive = np.flatnonzero(keep)
+                k = len(alive)
+                # alive is sorted, so packing in place keeps the order
+                self.pos[:k] = self.pos[alive]
+                self.radii[:k] = self.radii[alive]
+                self.life[:k] = self.life[alive]
+                self.colors[:k] = self.colors[alive]
+                self.count = k
+
+        if source is not None and self._ticks % self.emit_every == 0:
+            self.emit(source[0], source[1])
+        self._ticks += 1
+
+
+def draw_particles(scene, pool, atlas):
+    n = pool.count
+    for (x, y), r, col in zip(pool.pos[:n].tolist(), pool.radii[:n].astype(np.int32).tolist(),
+                              pool.colors[:n].tolist()):
+        scene.add(atlas.circle(r, col, 1), x, y)
@@ -0,0 +1,164 @@
+import threading
+import time
+
+from .pacer import FramePacer
+from .profiling import profiler
+
+
+class LatestQueue:
+    """Single-slot queue: put() overwrites, get() waits for something newer."""
+
+    def __init__(self):
+        self._cond = threading.Condition()
+        self._item = None
+        self._seq = 0
+        self._taken = 0
+        self.dropped = 0
+
+    def put(self, item):
+        """Returns the item this one replaces if nobody got() it, else None."""
+        with self._cond:
+            stale = None
+            if self._seq > self._taken:
+                self.dropped += 1
+                stale = self._item
+            self._item = item
+            self._seq += 1
+            self._cond.notify_all()
+            return stale
+
+    def get(self, last_seq=0, timeout=None):
+        """Returns (seq, item) newer than last_seq, or (last_seq, None) on timeout."""
+        with self._cond:
+            if not self._cond.wait_for(lambda: self._seq > last_seq, timeout):
+                return last_seq, None
+            self._taken = self._seq
+            return self._seq, self._item
+
+    def peek(self):
+        with self._cond:
+            return self._seq, self._item
+
+
+# -----------------------------------------------------------
+# CAPTURE -> INFERENCE -> SIMULATE -> RENDER
+# -----------------------------------------------------------
+class GamePipeline:
+    """Long-lived capture, inference and game-tick threads.
+
+    read_frame() -> frame or None
+    infer(frame) -> results
+    tick(frame, results, captured_at) -> (rgb_out, delay)
+
+    captured_at is the time.monotonic() the frame was read at.
+
+    Frames are passed along, not copied: each stage owns the frame it
+    took from the one before, and frames that are dropped or replaced go
+    back through release(frame) (e.g. FramePrep.release). tick() may use
+    its frame only until it returns, and frames handed out by latest()
+    only until the next tick.
+
+    Ticks are paced against monotonic deadlines (see backend.pacer); an
+    optional QualityGovernor is fed every tick's slack and load.
+
+    Each stage only ever looks at the newest output of the stage before it,
+    so a slow stage drops stale frames instead of stalling the others.
+    """
+
+    def __init__(self, read_frame, infer, tick, governor=None, release=None):
+        self.read_frame = read_frame
+        self.release = release or (lambda frame: None)
+        self.infer = infer
+        self.tick = tick
+        self.pacer = FramePacer()
+        self.governor = governor
+
+        self.frames = LatestQueue()    # (captured_at, frame)
+        self.results = LatestQueue()   # (captured_at, frame, results)
+        self.output = LatestQueue()    # (camera_frame, rgb_out)
+
+        self.error = None
+        self._stop = threading.Event()
+        self.threads = [
+            threading.Thread(target=self._run, args=(self._capture_loop,), name="capture", daemon=True),
+            threading.Thread(target=self._run, args=(self._inference_loop,), name="inference", daemon=True),
+            threading.Thread(target=self._run, args=(self._tick_loop,), name="tick", daemon=True),
+        ]
+
+    # ---- lifecycle ----
+    def start(self):
+        for t in self.threads:
+            t.start()
+        return self
+
+    def stop(self, timeout=1.0):
+        self._stop.set()
+        for t in self.threads:
+            if t.is_alive():
+                t.join(timeout)
+
+    @property
+    def running(self):
+        return not self._stop.is_set()
+
+    def latest(self, last_seq=0, timeout=None):
+        """Subscribe to finished frames: (seq, (camera_frame, rgb_out))."""
+        return self.output.get(last_seq, timeout)
+
+    def _run(self, loop):
+        try:
+            loop()
+        except Exception as exc:  # surfaced to the page through .error
+            self.error = exc
+            self._stop.set()
+
+    # ---- stages ----
+    def _capture_loop(self):
+        while not self._stop.is_set():
+            with profiler.span("capture"):
+                frame = self.read_frame()
+            if frame is None:
+                raise RuntimeError("Camera error")
+            stale = self.frames.put((time.monotonic(), frame))
+            if stale is not None:
+                self.release(stale[1])
+
+    def _inference_loop(self):
+        seq = 0
+        while not self._stop.is_set():
+            seq, item = self.frames.get(seq, timeout=0.1)
+            if item is None:
+                continue
+            captured_at, frame = item
+            with profiler.span("inference"):
+                results = self.infer(frame)
+            stale = self.results.put((captured_at, frame, results))
+            if stale is not None:
+                self.release(stale[1])
+
+    def _tick_loop(self):
+        # The game ticks at its own rate and reuses the newest hand
+        # results; it never waits on the camera or the model.
+        seq, current = 0, None
+        while current is None and not self._stop.is_set():
+            seq, current = self.results.get(0, timeout=0.1)
+
+        pacer = self.pacer
+        while not self._stop.is_set():
+            pacer.begin()
+            seq, item = self.results.get(seq, timeout=0)
+            if item is not None:
+                self.release(current[1])
+                current = item
+            captured_at, frame, results = current
+            with profiler.span("tick"):
+                rgb_out, delay = self.tick(frame, results, captured_at)
+            self.output.put((frame, rgb_out))
+            profiler.mark_frame()
+
+            slack = pacer.end(delay)
+            if self.governor is not None:
+                self.governor.observe(slack, pacer.load)
+            if slack > 0:
+                with profiler.span("sleep"):
+                    self._stop.wait(slack)
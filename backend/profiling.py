@@ -0,0 +1,155 @@
+import json
+import os
+import threading
+import time
+from collections import deque
+
+import cv2
+
+
+class _NullSpan:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NULL_SPAN = _NullSpan()
+
+
+class _Span:
+    __slots__ = ("profiler", "name", "start")
+
+    def __init__(self, profiler, name):
+        self.profiler = profiler
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, *exc):
+        self.profiler.record(self.name, self.start, time.perf_counter_ns())
+        return False
+
+
+class Profiler:
+    """Named spans with rolling per-stage percentiles.
+
+    While disabled, span() hands back one shared no-op context manager, so
+    instrumented code pays a flag check and nothing else.
+    """
+
+    def __init__(self, enabled=False, window=600, max_events=50000):
+        self.enabled = enabled
+        self.window = window
+        self._stages = {}
+        self._events = deque(maxlen=max_events)
+        self._frames = deque(maxlen=window)
+        self._lock = threading.Lock()
+        self._t0 = time.perf_counter_ns()
+
+    def span(self, name):
+        if not self.enabled:
+            return _NULL_SPAN
+        return _Span(self, name)
+
+    def record(self, name, start_ns, end_ns):
+        with self._lock:
+            stage = self._stages.get(name)
+            if stage is None:
+                stage = self._stages[name] = deque(maxlen=self.window)
+            stage.append((end_ns - start_ns) / 1e9)
+            self._events.append((name, threading.get_ident(), start_ns, end_ns))
+
+    def mark_frame(self):
+        if self.enabled:
+            self._frames.append(time.perf_counter())
+
+    def reset(self):
+        with self._lock:
+            self._stages.clear()
+            self._events.clear()
+            self._frames.clear()
+
+    # ---- reporting ----
+    def fps(self):
+        frames = list(self._frames)
+        if len(frames) < 2:
+            return 0.0
+        return (len(frames) - 1) / (frames[-1] - frames[0])
+
+    def stats(self):
+        """{stage: {"count", "p50", "p95", "p99", "max"}} in seconds."""
+        with self._lock:
+            stages = {name: sorted(d) for name, d in self._stages.items()}
+        out = {}
+        for name, d in stages.items():
+            if not d:
+                continue
+            n = len(d)
+            out[name] = {
+                "count": n,
+                "p50": d[int(0.50 * (n - 1))],
+                "p95": d[int(0.95 * (n - 1))],
+                "p99": d[int(0.99 * (n - 1))],
+                "max": d[-1],
+            }
+        return out
+
+    def draw_overlay(self, rgb, origin=(560, 30)):
+        """Writes fps and per-stage p50/p95 (ms) onto the frame; returns
+        the (x0, y0, x1, y1) it may have drawn on."""
+        x, y = origin
+        cv2.putText(rgb, f"{self.fps():5.1f} fps", (x, y),
+                    cv2.FONT_HERSHEY_SIMPLEX, 0.5, (255, 255, 255), 1)
+        for name, s in sorted(self.stats().items()):
+            y += 16
+            cv2.putText(rgb, f"{name[:14]:<14} {s['p50'] * 1e3:5.1f} {s['p95'] * 1e3:5.1f}",
+                        (x, y), cv2.FONT_HERSHEY_PLAIN, 0.9, (200, 200, 200), 1)
+        return origin[0], origin[1] - 16, rgb.shape[1], y + 6
+
+    def chrome_trace(self):
+        """Trace-event JSON object, loadable in chrome://tracing / Perfetto."""
+        with self._lock:
+            events = list(self._events)
+        pid = os.getpid()
+        return {
+            "traceEvents": [
+                {"name": name, "ph": "X", "pid": pid, "tid": tid,
+                 "ts": (start - self._t0) / 1e3, "dur": (end - start) / 1e3}
+                for name, tid, start, end in events
+            ],
+            "displayTimeUnit": "ms",
+        }
+
+    def prometheus_text(self, prefix="snake_stage_seconds"):
+        lines = [f"# TYPE {prefix} summary"]
+        for name, s in sorted(self.stats().items()):
+            for q in ("p50", "p95", "p99"):
+                lines.append(f'{prefix}{{stage="{name}",quantile="0.{q[1:]}"}} {s[q]:.6f}')
+            lines.append(f'{prefix}_count{{stage="{name}"}} {s["count"]}')
+        lines.append(f"snake_fps {self.fps():.2f}")
+        return "\n".join(lines) + "\n"
+
+    def dump(self, path):
+        """Writes a Chrome trace (.json) or Prometheus text (anything else).
+
+        The file is replaced in one step, so a scraper never reads half of it.
+        """
+        tmp = f"{path}.tmp"
+        with open(tmp, "w") as f:
+            if path.endswith(".json"):
+                json.dump(self.chrome_trace(), f)
+            else:
+                f.write(self.prometheus_text())
+        os.replace(tmp, path)
+
+
+# Shared instance; turn on with SNAKE_PROFILE=1 or profiler.enabled = True
+profiler = Profiler(enabled=os.environ.get("SNAKE_PROFILE") == "1")
+# Where the app writes profiler.dump() while profiling, if anywhere
+DUMP_PATH = os.environ.get("SNAKE_PROFILE_DUMP")
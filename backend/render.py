@@ -0,0 +1,97 @@
+import numpy as np
+from .layers import get_static_layer
+from .sprites import Scene, get_atlas
+from .snake import draw_snake
+from .particles import draw_particles
+from .food import draw_food, draw_blue_food, draw_invisible
+from .obstacles import draw_obstacles
+from .boss import draw_boss
+
+
+# The score pulses through this many colours a second; stepping it keeps
+# the HUD text rasters cached and the HUD region unchanged most frames.
+PULSE_STEPS = 8
+
+
+# -----------------------------------------------------------
+# DRAW A GAME STATE
+# -----------------------------------------------------------
+def render(rgb, state, theme_name=None, leaderboard=None):
+    """Draws the state produced by sim.update(); never changes it.
+
+    leaderboard (GameRecords, best first) is listed on the start and
+    game-over screens.
+    """
+    theme_name = theme_name or state.theme_name
+
+    # ---- BACKGROUND + WALL BORDER (cached) ----
+    np.copyto(rgb, get_static_layer(theme_name, state.width, state.height))
+    build_scene(state, theme_name, leaderboard).draw(rgb)
+    return rgb
+
+
+def build_scene(state, theme_name=None, leaderboard=None):
+    """Everything render() draws over the static layer, as a Scene."""
+    theme_name = theme_name or state.theme_name
+    width, height = state.width, state.height
+    atlas = get_atlas(theme_name)
+    scene = Scene()
+
+    # ---- BEFORE GAME START — WAIT FOR HAND ----
+    if not state.game_started and not state.game_over:
+        scene.text("Show your hand to START", (140, height // 2), 1.0, (255, 255, 255), 2)
+        if leaderboard:
+            draw_leaderboard(scene, leaderboard, width // 2 - 150, height // 2 + 60)
+        return scene
+
+    # ---- GAME OVER SCREEN ----
+    if state.game_over:
+        title = "BOARD FULL!" if state.board_full else "GAME OVER!"
+        scene.text(title, (width // 2 - 150, height // 2 - 40), 1.4, (255, 50, 50), 3)
+        scene.text("Show your hand to restart", (width // 2 - 200, height // 2 + 20),
+                   0.8, (255, 255, 255), 2)
+        if leaderboard:
+            draw_leaderboard(scene, leaderboard, width // 2 - 150, height // 2 + 70)
+        return scene
+
+    # ---- ENTITIES ----
+    draw_obstacles(scene, state.obstacles, atlas)
+    draw_blue_food(scene, state.blue_food_pos, atlas)
+    draw_invisible(scene, state.invisible_food_pos, atlas)
+    draw_food(scene, state.food_pos, state.food_kind, atlas)
+
+    if state.boss_active:
+        draw_boss(scene, state.boss_pos, atlas)
+
+    draw_particles(scene, state.particles, atlas)
+    draw_snake(scene, state.snake_body, atlas)
+
+    # ---- HUD ----
+    draw_hud(scene, state)
+    return scene
+
+
+def draw_hud(scene, state):
+    score = state.score
+    level = state.level
+
+    pulse = int(state.sim_time % 1 * PULSE_STEPS) / PULSE_STEPS
+    r, g, b = int(128 + 127 * pulse), 255, 255
+    scene.text(f"Score: {score}", (20, 40), 1.0, (r, g, b), 3)
+    scene.text(f"High: {state.high_score}", (20, 80), 0.9, (255, 215, 0), 2)
+    scene.text(f"Level: {level}", (20, 120), 0.9, (0, 200, 255), 2)
+
+    # Level-up progress bar
+    bar_w = int(((score % 5) / 5.0) * 200)
+    scene.box((20, 150), (220, 170), (40, 40, 40))
+    scene.box((20, 150), (20 + bar_w, 170), (0, 200, 255))
+
+
+def draw_leaderboard(scene, games, x, y, rows=5):
+    scene.text("Top scores", (x, y), 0.7, (255, 215, 0), 2)
+    for i, game in enumerate(games[:rows], 1):
+        row = y + 28 * i
+        # the font is proportional, so each column gets its own x
+        for text, dx in ((f"{i}. {(game.player or 'anonymous')[:14]}", 0),
+                         (str(game.score), 200), (f"L{game.level}", 270)):
+            scene.text(text, (x + dx, row), 0.6, (255, 255, 255), 1)
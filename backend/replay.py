@@ -0,0 +1,184 @@
+import math
+import os
+import random
+import struct
+
+import numpy as np
+
+from .sim import update, EV_EAT_NORMAL, EV_EAT_GOLD, EV_BOOST, EV_GAME_OVER
+from .state import GameState
+from .render import render
+
+# A recording is two files:
+#   <path>       header + one fixed-size record per tick (memory-mappable)
+#   <path>.keys  keyframes: the GameState and RNG state before every Nth tick
+_MAGIC = b"SNKR"
+_VERSION = 1
+# magic, version, record size, keyframe interval, seed, width, height, theme
+_HEADER = struct.Struct("<4sHHIqHH32s")
+# now, dt, fingertip x / y (what update() got; NaN = no hand),
+# raw fingertip x / y (before the input filter), latency, score, events
+_RECORD = struct.Struct("<ddddfffIB")
+RECORD_DTYPE = np.dtype([
+    ("now", "<f8"), ("dt", "<f8"), ("x", "<f8"), ("y", "<f8"),
+    ("raw_x", "<f4"), ("raw_y", "<f4"), ("latency", "<f4"),
+    ("score", "<u4"), ("events", "u1"),
+])
+assert RECORD_DTYPE.itemsize == _RECORD.size
+
+# frame, state bytes length; then state bytes, then the RNG state
+_KEY = struct.Struct("<II")
+_RNG = struct.Struct("<i625Id")  # version, Mersenne Twister words + index, gauss
+_NO_GAUSS = float("nan")
+
+EVENTS = (EV_EAT_NORMAL, EV_EAT_GOLD, EV_BOOST, EV_GAME_OVER)
+_EVENT_BITS = {ev: 1 << i for i, ev in enumerate(EVENTS)}
+
+
+def event_mask(events):
+    mask = 0
+    for ev in events:
+        mask |= _EVENT_BITS[ev]
+    return mask
+
+
+def _pack_rng(rng):
+    version, words, gauss = rng.getstate()
+    return _RNG.pack(version, *words, _NO_GAUSS if gauss is None else gauss)
+
+
+def _unpack_rng(data, offset=0):
+    version, *words, gauss = _RNG.unpack_from(data, offset)
+    rng = random.Random()
+    rng.setstate((version, tuple(words), None if gauss != gauss else gauss))
+    return rng
+
+
+# -----------------------------------------------------------
+# RECORDING
+# -----------------------------------------------------------
+class SessionRecorder:
+    """Writes a replayable recording of one player's ticks.
+
+    Pass it to advance_frame()/step_frame() together with the game's own
+    seeded random.Random: before() drops a keyframe every
+    `keyframe_every` ticks, record() appends one fixed-size tick record.
+    """
+
+    def __init__(self, path, state, seed, keyframe_every=300):
+        self.path = path
+        self.keyframe_every = keyframe_every
+        self.frames = 0
+        self._f = open(path, "wb")
+        self._keys = open(path + ".keys", "wb")
+        theme = state.theme_name.encode()[:32]
+        self._f.write(_HEADER.pack(_MAGIC, _VERSION, _RECORD.size, keyframe_every,
+                                   seed, state.width, state.height, theme))
+
+    def before(self, state, rng):
+        """Call before update(); writes a keyframe when one is due."""
+        if self.frames % self.keyframe_every == 0:
+            blob = state.to_bytes()
+            self._keys.write(_KEY.pack(self.frames, len(blob)))
+            self._keys.write(blob)
+            self._keys.write(_pack_rng(rng))
+
+    def record(self, now, dt, fingertip, raw, latency, score, events):
+        nan = math.nan
+        x, y = fingertip if fingertip is not None else (nan, nan)
+        rx, ry = raw if raw is not None else (nan, nan)
+        self._f.write(_RECORD.pack(now, dt, x, y, rx, ry,
+                                   nan if latency is None else latency,
+                                   score, event_mask(events)))
+        self.frames += 1
+
+    def close(self):
+        for f in (self._f, self._keys):
+            if not f.closed:
+                f.close()
+
+
+# -----------------------------------------------------------
+# REPLAY
+# -----------------------------------------------------------
+class SessionReplay:
+    """Memory-mapped view of a recording that re-runs it through the engine.
+
+    records is a read-only structured array (see RECORD_DTYPE), so stats
+    over a whole session need no parsing. seek(frame) restores the state
+    and RNG just before that tick from the nearest keyframe; run() then
+    replays ticks as fast as the engine goes and reports any tick whose
+    score or events differ from what was recorded.
+    """
+
+    def __init__(self, path):
+        with open(path, "rb") as f:
+            head = f.read(_HEADER.size)
+        magic, version, rec_size, self.keyframe_every, self.seed, \
+            self.width, self.height, theme = _HEADER.unpack(head)
+        if magic != _MAGIC or version != _VERSION or rec_size != _RECORD.size:
+            raise ValueError(f"{path} is not a version {_VERSION} session recording")
+        self.theme_name = theme.rstrip(b"\0").decode()
+
+        # Only whole records count; a crash mid-write leaves a torn tail
+        count = (os.path.getsize(path) - _HEADER.size) // _RECORD.size
+        if count:
+            self.records = np.memmap(path, RECORD_DTYPE, "r", _HEADER.size, (count,))
+        else:
+            self.records = np.empty(0, RECORD_DTYPE)
+
+        with open(path + ".keys", "rb") as f:
+            self._keys = f.read()
+        self.keyframes = []  # (frame, state offset, state size)
+        off = 0
+        while off + _KEY.size <= len(self._keys):
+            frame, size = _KEY.unpack_from(self._keys, off)
+            if off + _KEY.size + size + _RNG.size > len(self._keys):
+                break
+            self.keyframes.append((frame, off + _KEY.size, size))
+            off += _KEY.size + size + _RNG.size
+
+    def __len__(self):
+        return len(self.records)
+
+    def seek(self, frame):
+        """(state, rng) as they were just before tick `frame`."""
+        frame = min(max(frame, 0), len(self))
+        start = None
+        for key in self.keyframes:
+            if key[0] > frame:
+                break
+            start = key
+        if start is None:
+            raise ValueError("recording has no keyframe at or before that tick")
+        key_frame, off, size = start
+        state = GameState.from_bytes(self._keys[off:off + size])
+        rng = _unpack_rng(self._keys, off + size)
+        for i in range(key_frame, frame):
+            self.tick(state, rng, i)
+        return state, rng
+
+    def run(self, start=0, stop=None, rgb=None):
+        """Replays ticks [start, stop); returns (state, mismatched tick indices).
+
+        With an rgb canvas every tick is also drawn, e.g. to profile
+        rendering on recorded play.
+        """
+        stop = len(self) if stop is None else min(stop, len(self))
+        state, rng = self.seek(start)
+        mismatches = []
+        for i in range(start, stop):
+            if not self.tick(state, rng, i):
+                mismatches.append(i)
+            if rgb is not None:
+                render(rgb, state)
+        return state, mismatches
+
+    def tick(self, state, rng, i):
+        """Re-runs recorded tick i on (state, rng); True if it matched."""
+        rec = self.records[i]
+        x = float(rec["x"])
+        fingertip = None if x != x else (x, float(rec["y"]))
+        events = update(state, fingertip, float(rec["dt"]), rng)
+        state.last_tick = float(rec["now"])
+        return state.score == rec["score"] and event_mask(events) == rec["events"]
@@ -0,0 +1,206 @@
+import queue
+import socket
+import sqlite3
+import threading
+import time
+from collections import namedtuple
+
+GameRecord = namedtuple("GameRecord", "score level duration theme player station ended_at")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS games (
+    id       INTEGER PRIMARY KEY,
+    score    INTEGER NOT NULL,
+    level    INTEGER NOT NULL,
+    duration REAL    NOT NULL,
+    theme    TEXT    NOT NULL,
+    player   TEXT    NOT NULL,
+    station  TEXT    NOT NULL,
+    ended_at REAL    NOT NULL
+);
+-- top-N and per-player best are both a short walk down one of these
+CREATE INDEX IF NOT EXISTS games_by_score  ON games (score DESC, ended_at);
+CREATE INDEX IF NOT EXISTS games_by_player ON games (player, score DESC);
+"""
+_COLUMNS = "score, level, duration, theme, player, station, ended_at"
+_INSERT = f"INSERT INTO games ({_COLUMNS}) VALUES (?, ?, ?, ?, ?, ?, ?)"
+_TOP = f"SELECT {_COLUMNS} FROM games ORDER BY score DESC, ended_at LIMIT ?"
+_BEST = f"SELECT {_COLUMNS} FROM games WHERE player = ? ORDER BY score DESC LIMIT 1"
+
+_FLUSH = object()
+_STOP = object()
+
+
+def _connect(path):
+    conn = sqlite3.connect(path, timeout=10.0, check_same_thread=False)
+    # WAL lets the stations read while one of them writes; NORMAL sync is
+    # durable at every checkpoint and doesn't fsync on each commit.
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    return conn
+
+
+class ScoreStore:
+    """Finished games in SQLite, written in batches by a background thread.
+
+    record() only queues the game, so a game over never waits on disk.
+    The writer commits up to `batch_size` games per transaction, at most
+    `flush_every` seconds after the first one queued. top() answers from
+    an in-memory copy of the best `top_n` games, refreshed after every
+    batch and every `refresh_every` seconds, so scores from other
+    stations sharing the database file show up too.
+    """
+
+    def __init__(self, path="scores.db", station=None, top_n=10, batch_size=64,
+                 flush_every=1.0, refresh_every=5.0):
+        self.path = path
+        self.station = station or socket.gethostname()
+        self.top_n = top_n
+        self.batch_size = batch_size
+        self.flush_every = flush_every
+        self.refresh_every = refresh_every
+        self.written = 0
+        self.error = None
+
+        self._conn = _connect(path)
+        self._conn.executescript(_SCHEMA)
+        self._conn.commit()
+        self._read_lock = threading.Lock()
+        self._top = ()
+        self._cache_lock = threading.Lock()
+        self.refresh()
+
+        self._queue = queue.SimpleQueue()
+        self._thread = threading.Thread(target=self._run, name="scores", daemon=True)
+        self._thread.start()
+
+    # ---- writes ----
+    def record(self, score, level, duration, theme, player=""):
+        """Queues one finished game; returns immediately."""
+        game = GameRecord(int(score), int(level), float(duration), theme,
+                          player or "", self.station, time.time())
+        self._merge((game,))
+        self._queue.put(game)
+        return game
+
+    def record_state(self, state, player=""):
+        """record() for a GameState that just ended."""
+        return self.record(state.score, state.level, state.sim_time, state.theme_name, player)
+
+    def flush(self, timeout=None):
+        """Blocks until everything recorded so far is committed."""
+        done = threading.Event()
+        self._queue.put((_FLUSH, done))
+        return done.wait(timeout)
+
+    def close(self, timeout=5.0):
+        if self._thread.is_alive():
+            self._queue.put(_STOP)
+            self._thread.join(timeout)
+        self._conn.close()
+
+    def _run(self):
+        last_refresh = time.monotonic()
+        while True:
+            try:
+                item = self._queue.get(timeout=self.refresh_every)
+            except queue.Empty:
+                item = None
+
+            batch, waiters, stop = [], [], False
+            deadline = time.monotonic() + self.flush_every
+            while item is not None:
+                if item is _STOP:
+                    stop = True
+                elif isinstance(item, tuple) and item[0] is _FLUSH:
+                    waiters.append(item[1])
+                    # a flush request doesn't wait out the batch window
+                    deadline = 0.0
+                else:
+                    batch.append(item)
+                if stop or len(batch) >= self.batch_size:
+                    break
+                try:
+                    item = self._queue.get(timeout=max(deadline - time.monotonic(), 0.0))
+                except queue.Empty:
+                    item = None
+
+            if batch:
+                self._write(batch)
+            now = time.monotonic()
+            if batch or now - last_refresh >= self.refresh_every:
+                self.refresh()
+                last_refresh = now
+            for done in waiters:
+                done.set()
+            if stop:
+                return
+
+    def _write(self, batch):
+        try:
+            with self._read_lock, self._conn:
+                self._conn.executemany(_INSERT, batch)
+            self.written += len(batch)
+        except sqlite3.Error as exc:  # the game goes on; surfaced via .error
+            self.error = exc
+
+    # ---- reads ----
+    def _query(self, sql, args):
+        with self._read_lock:
+            return [GameRecord(*row) for row in self._conn.execute(sql, args)]
+
+    def refresh(self):
+        """Reloads the cached top-N from the database."""
+        try:
+            rows = self._query(_TOP, (self.top_n,))
+        except sqlite3.Error as exc:
+            self.error = exc
+            return
+        with self._cache_lock:
+            # keep queued games that aren't committed yet
+            self._top = tuple(self._ranked(set(rows) | set(self._top), self.top_n))
+
+    def _merge(self, games):
+        with self._cache_lock:
+            self._top = tuple(self._ranked(self._top + tuple(games), self.top_n))
+
+    @staticmethod
+    def _ranked(games, n):
+        return sorted(games, key=lambda g: (-g.score, g.ended_at))[:n]
+
+    def top(self, n=None):
+        """Best games, highest score first; from the cache when n <= top_n."""
+        if n is None or n <= self.top_n:
+            return self._top[:n]
+        return self._query(_TOP, (n,))
+
+    def best(self, player):
+        """The player's best game, or None."""
+        rows = self._query(_BEST, (player or "",))
+        return rows[0] if rows else None
+
+    @property
+    def high_score(self):
+        top = self._top
+        return top[0].score if top else 0
+
+    def player(self, name):
+        return PlayerScores(self, name)
+
+
+class PlayerScores:
+    """A ScoreStore as seen by one player's game loop (see engine.step_frame)."""
+
+    def __init__(self, store, name=""):
+        self.store = store
+        self.name = name or ""
+
+    def game_over(self, state):
+        self.store.record_state(state, self.name)
+
+    def top(self, n=None):
+        return self.store.top(n)
+
+    @property
+    def high_score(self):
+        return self.store.high_score
@@ -0,0 +1,258 @@
+import itertools
+import queue
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from .engine import advance_frame
+from .compositor import Compositor
+from .sim import init_state
+from .tracking import HandTracker, NO_HANDS
+from .filters import make_filter
+from .pipeline import LatestQueue
+from .profiling import profiler
+
+
+class _ModelPool:
+    """A few shared hand models, lent out to one inference at a time."""
+
+    def __init__(self, factory, size):
+        self._models = queue.Queue()
+        for _ in range(size):
+            self._models.put(factory())
+
+    def process(self, rgb):
+        model = self._models.get()
+        try:
+            return model.process(rgb)
+        finally:
+            self._models.put(model)
+
+
+class PlayerSession:
+    """One player station registered with a GameServer."""
+
+    def __init__(self, session_id, theme_name, width, height, pool, every_n, input_filter,
+                 on_frame=None, scores=None, incremental=False):
+        self.id = session_id
+        self.on_frame = on_frame
+        self.scores = scores
+        self.compositor = Compositor() if incremental else None
+        self.theme_name = theme_name
+        self.state = init_state(width, height, theme_name)
+        self.tracker = HandTracker(pool, every_n=every_n)
+        self.input_filter = make_filter(input_filter)
+        self.frames = LatestQueue()    # (captured_at, frame_rgb)
+        self.output = LatestQueue()    # (frame_rgb, rgb_out, events)
+
+        self.release = None            # release(frame), for frames it is done with
+        self._frame_seq = 0            # last frame handed to inference
+        self._job = None               # in-flight inference future
+        self._frame = None             # newest inferred frame
+        self._results = NO_HANDS
+        self._captured_at = None
+        self._next_tick = 0.0
+        self._canvases = [np.empty((height, width, 3), np.uint8) for _ in range(3)]
+        self._canvas_i = 0
+
+        self.stats = {"ticks": 0, "inferred": 0, "stale": 0, "late": 0}
+
+    def submit_frame(self, frame, captured_at=None):
+        stale = self.frames.put((time.monotonic() if captured_at is None else captured_at, frame))
+        if stale is not None:
+            self._release(stale[1])
+
+    def _release(self, frame):
+        if self.release is not None and frame is not None:
+            self.release(frame)
+
+    def latest(self, last_seq=0, timeout=None):
+        return self.output.get(last_seq, timeout)
+
+
+class GameServer:
+    """Steps many player sessions on one host.
+
+    Each session pushes mirrored RGB camera frames (see backend.frames)
+    with submit_frame(). A scheduler
+    thread ticks at tick_rate: it hands every session's newest frame to a
+    small pool of shared hand models, then advances every session whose
+    game tick is due. Sessions are served in rotating order and have at
+    most one inference in flight, so a busy station cannot starve the
+    others. Frames older than latency_budget are dropped before inference,
+    and results that come back later than that are discarded.
+
+    Frames are not copied: the server owns each submitted frame until it
+    is dropped or replaced, then hands it to the session's release().
+    on_frame and latest() get the newest inferred frame, valid until the
+    next tick.
+
+    Shared models see frames from several players, so the factory should
+    build them with static_image_mode=True (or return an InferenceService);
+    each session's HandTracker provides the ROI tracking.
+
+    With a scores store (backend.scores.ScoreStore) every session's
+    finished games are recorded under the player name it registered with.
+    With incremental=True each session draws through a Compositor, whose
+    dirty rects on_frame callbacks can hand to StreamChannel.publish().
+    """
+
+    def __init__(self, hands_factory, models=2, tick_rate=100, latency_budget=0.15,
+                 width=800, height=600, every_n=1, input_filter="one_euro", scores=None,
+                 incremental=False):
+        self.scores = scores
+        self.incremental = incremental
+        self.width = width
+        self.height = height
+        self.tick_period = 1.0 / tick_rate
+        self.latency_budget = latency_budget
+        self.every_n = every_n
+        self.input_filter = input_filter
+
+        self._pool = _ModelPool(hands_factory, models)
+        self._executor = ThreadPoolExecutor(models, thread_name_prefix="hands")
+        self._sessions = {}
+        self._lock = threading.Lock()
+        self._round = itertools.count()
+        self._stop = threading.Event()
+        self._thread = None
+        self._captures = {}
+        self.error = None
+
+    # ---- sessions ----
+    def register(self, session_id, theme_name="Neon", on_frame=None, player=""):
+        """Adds a station; on_frame(frame, rgb_out, events) is called after each tick."""
+        scores = self.scores.player(player) if self.scores is not None else None
+        session = PlayerSession(session_id, theme_name, self.width, self.height,
+                                self._pool, self.every_n, self.input_filter, on_frame,
+                                scores, self.incremental)
+        with self._lock:
+            self._sessions[session_id] = session
+        return session
+
+    def unregister(self, session_id):
+        with self._lock:
+            self._sessions.pop(session_id, None)
+            stop = self._captures.pop(session_id, None)
+        if stop is not None:
+            stop.set()
+
+    def session(self, session_id):
+        return self._sessions.get(session_id)
+
+    def attach_capture(self, session_id, read_frame, release=None):
+        """Feeds a session from read_frame() -> RGB frame or None, in its own
+        thread; frames the server is done with go back through release()."""
+        session = self._sessions[session_id]
+        session.release = release
+        stop = threading.Event()
+
+        def loop():
+            while not stop.is_set() and not self._stop.is_set():
+                frame = read_frame()
+                if frame is None:
+                    stop.wait(0.05)
+                    continue
+                session.submit_frame(frame)
+
+        with self._lock:
+            self._captures[session_id] = stop
+        threading.Thread(target=loop, name=f"capture-{session_id}", daemon=True).start()
+
+    # ---- lifecycle ----
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="game-server", daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(1.0)
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+    @property
+    def running(self):
+        return self._thread is not None and not self._stop.is_set()
+
+    def _run(self):
+        try:
+            deadline = time.monotonic()
+            while not self._stop.is_set():
+                self.tick(time.monotonic())
+                deadline += self.tick_period
+                remaining = deadline - time.monotonic()
+                if remaining > 0:
+                    self._stop.wait(remaining)
+                else:
+                    deadline = time.monotonic()  # fell behind; don't try to catch up
+        except Exception as exc:
+            self.error = exc
+            self._stop.set()
+
+    # ---- scheduling ----
+    def tick(self, now):
+        with self._lock:
+            sessions = list(self._sessions.values())
+        if not sessions:
+            return
+        # rotate the service order every tick for fairness
+        k = next(self._round) % len(sessions)
+        sessions = sessions[k:] + sessions[:k]
+
+        for s in sessions:
+            self._collect(s, now)
+            self._schedule(s, now)
+        for s in sessions:
+            if now >= s._next_tick:
+                self._step(s, now)
+
+    def _collect(self, s, now):
+        if s._job is None or not s._job.done():
+            return
+        captured_at, frame, results = s._job.result()
+        s._job = None
+        if now - captured_at > self.latency_budget:
+            s.stats["late"] += 1
+            s._release(frame)
+            return
+        s._release(s._frame)
+        s._frame, s._results, s._captured_at = frame, results, captured_at
+        s.stats["inferred"] += 1
+
+    def _schedule(self, s, now):
+        if s._job is not None:
+            return
+        s._frame_seq, item = s.frames.get(s._frame_seq, timeout=0)
+        if item is None:
+            return
+        captured_at, frame = item
+        if now - captured_at > self.latency_budget:
+            s.stats["stale"] += 1
+            s._release(frame)
+            return
+        s._job = self._executor.submit(self._infer, s.tracker, captured_at, frame)
+
+    @staticmethod
+    def _infer(tracker, captured_at, frame):
+        with profiler.span("hands.process"):
+            return captured_at, frame, tracker.process(frame)
+
+    def _step(self, s, now):
+        canvas = s._canvases[s._canvas_i]
+        s._canvas_i = (s._canvas_i + 1) % len(s._canvases)
+        frame = s._frame
+        rgb_out, delay, events = advance_frame(
+            canvas, s._results, s.state, s.theme_name, self.width, self.height,
+            input_filter=s.input_filter, captured_at=s._captured_at, scores=s.scores,
+            compositor=s.compositor,
+        )
+        s.output.put((frame, rgb_out, events))
+        if s.on_frame is not None:
+            s.on_frame(frame, rgb_out, events)
+        s.stats["ticks"] += 1
+        # keep each session's own level-dependent speed on the shared clock
+        s._next_tick = max(s._next_tick + delay, now - delay)
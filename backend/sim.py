@@ -0,0 +1,211 @@
+import random
+
+import numpy as np
+
+from .snake import move_snake, update_body
+from .food import spawn_food, maybe_spawn_blue, maybe_spawn_invisible
+from .obstacles import (
+    update_obstacles, add_obstacles, set_speed, obstacle_count, obstacle_speed,
+)
+from .boss import update_boss, BOSS_CLEARANCE, BOSS_HIT_RADIUS
+from .collision import swept_hits, HEAD_RADIUS, PICKUP_RADIUS
+from .state import GameState, FOOD_RADIUS
+
+SPEED_BOOST_SECONDS = 7.0
+INVISIBLE_SECONDS = 6.0
+
+# Game events returned by update(); the caller decides how to present them.
+EV_EAT_NORMAL = "eat_normal"
+EV_EAT_GOLD = "eat_gold"
+EV_BOOST = "boost"
+EV_GAME_OVER = "game_over"
+
+# Rows of the per-tick contact batch; obstacles fill the rest
+_T_FOOD, _T_BLUE, _T_INVISIBLE, _T_BOSS, _T_OBSTACLES = range(5)
+
+
+def tick_delay(state):
+    """Seconds between ticks for the current level / boost."""
+    delay = max(0.015, 0.04 - (state.level - 1) * 0.003)
+    if state.speed_boost_active:
+        delay = max(0.01, delay * 0.6)
+    return delay
+
+
+def tick_smoothing(state):
+    if state.speed_boost_active:
+        return 0.28
+    return min(0.20, 0.12 + (state.level - 1) * 0.01)
+
+
+# -----------------------------------------------------------
+# INITIAL GAME STATE
+# -----------------------------------------------------------
+def init_state(width, height, theme_name="Neon"):
+    return GameState(width, height, theme_name)
+
+
+def scale_obstacles(state, rng=random):
+    """Brings obstacle count and speed in line with state.level."""
+    set_speed(state.obstacle_vel, obstacle_speed(state.level))
+    state.obstacles, state.obstacle_vel = add_obstacles(
+        state.obstacles, state.obstacle_vel,
+        obstacle_count(state.level), obstacle_speed(state.level),
+        state.width, state.height, rng,
+        grid=state.grid, clearance=FOOD_RADIUS, avoid=state.snake_pos,
+    )
+
+
+# -----------------------------------------------------------
+# HEADLESS GAME UPDATE
+# -----------------------------------------------------------
+def update(state, fingertip, dt, rng=random):
+    """Advances the game by dt simulated seconds.
+
+    fingertip is the (x, y) target in pixels, or None when no hand is seen.
+    Nothing here draws, sleeps or reads the wall clock, so it can run far
+    faster than real time. Returns the list of events that happened.
+    """
+    events = []
+    state.sim_time += dt
+
+    # ---- WAIT FOR HAND ----
+    if not state.game_started and not state.game_over:
+        if fingertip is not None:
+            state.game_started = True
+        return events
+
+    # ---- RESTART AFTER GAME OVER ----
+    if state.game_over:
+        if fingertip is not None:
+            state.reset()
+        return events
+
+    width, height = state.width, state.height
+    grid = state.grid
+    snake_pos = state.snake_pos
+    snake_body = state.snake_body
+    score = state.score
+    game_over = False
+
+    # ---- HAND TRACKING ----
+    # The head's path this tick runs from prev to head; every contact test
+    # below is made against that whole segment, so a fast move (boost,
+    # low frame rate, coarse dt) cannot jump over a target.
+    prev = snake_pos.tolist()
+    if fingertip is not None:
+        move_snake(snake_pos, fingertip[0], fingertip[1], tick_smoothing(state))
+
+    update_body(snake_body, snake_pos, score)
+    head = snake_pos.tolist()
+    state.particles.step(snake_body.head())
+
+    # ---- Obstacles ----
+    update_obstacles(state.obstacles, state.obstacle_vel, width, height,
+                     grid, FOOD_RADIUS)
+
+    # ---- Power-ups / boss move ----
+    blue_food = maybe_spawn_blue(state.blue_food_pos, grid, rng)
+    state.blue_food_pos = blue_food
+    invisible_food = maybe_spawn_invisible(state.invisible_food_pos, grid, rng)
+    state.invisible_food_pos = invisible_food
+
+    if state.level >= 10 and not state.boss_active:
+        state.boss_active = True
+        grid.add(state.boss_pos, BOSS_CLEARANCE)
+    if state.boss_active:
+        update_boss(state.boss_pos, snake_pos, grid)
+
+    # ---- CONTACTS (one batch) ----
+    obstacles = state.obstacles
+    targets = np.zeros((_T_OBSTACLES + len(obstacles), 3))
+    targets[_T_FOOD] = (state.food_pos[0], state.food_pos[1], PICKUP_RADIUS)
+    if blue_food is not None:
+        targets[_T_BLUE] = (blue_food[0], blue_food[1], PICKUP_RADIUS)
+    if invisible_food is not None:
+        targets[_T_INVISIBLE] = (invisible_food[0], invisible_food[1], PICKUP_RADIUS)
+    if state.boss_active:
+        targets[_T_BOSS] = (state.boss_pos[0], state.boss_pos[1], BOSS_HIT_RADIUS)
+    targets[_T_OBSTACLES:, :2] = obstacles[:, :2]
+    targets[_T_OBSTACLES:, 2] = obstacles[:, 2] + HEAD_RADIUS
+    hit = swept_hits(prev, head, targets[:, :2], targets[:, 2])
+
+    # ---- BLUE BOOST ----
+    if hit[_T_BLUE]:
+        state.speed_boost_active = True
+        state.speed_boost_timer = SPEED_BOOST_SECONDS
+        grid.remove(blue_food, FOOD_RADIUS)
+        state.blue_food_pos = None
+        events.append(EV_BOOST)
+    elif state.speed_boost_active:
+        state.speed_boost_timer -= dt
+        if state.speed_boost_timer <= 0:
+            state.speed_boost_active = False
+
+    # ---- INVISIBLE POWER ----
+    if hit[_T_INVISIBLE]:
+        state.invisible_active = True
+        state.invisible_timer = INVISIBLE_SECONDS
+        grid.remove(invisible_food, FOOD_RADIUS)
+        state.invisible_food_pos = None
+        events.append(EV_BOOST)
+    elif state.invisible_active:
+        state.invisible_timer -= dt
+        if state.invisible_timer <= 0:
+            state.invisible_active = False
+
+    # ---- FOOD COLLISION ----
+    if hit[_T_FOOD]:
+        if state.food_kind == "gold":
+            score += 5
+            events.append(EV_EAT_GOLD)
+        else:
+            score += 1
+            events.append(EV_EAT_NORMAL)
+
+        grid.remove(state.food_pos, FOOD_RADIUS)
+        food_pos, food_kind = spawn_food(grid, rng)
+        if food_pos is None:
+            state.board_full = True
+            game_over = True
+        else:
+            state.food_pos[:] = food_pos
+            state.food_kind = food_kind
+
+    # ---- BOSS FIGHT ----
+    if hit[_T_BOSS]:
+        game_over = True
+
+    # a level per 5 points scored; only points scored this tick level up
+    gained = score // 5 - state.score // 5
+    if gained:
+        state.level += gained
+        scale_obstacles(state, rng)
+
+    # ---- COLLISIONS ----
+    # border (the board is convex, so checking where the head ends is enough)
+    if head[0] < 5 or head[0] > width - 5 or head[1] < 5 or head[1] > height - 5:
+        game_over = True
+
+    # obstacles + self (unless invisible)
+    if not state.invisible_active:
+        if hit[_T_OBSTACLES:].any():
+            game_over = True
+
+        # The head used to be tested against body[4:]. The path starts at
+        # prev, which is body[1] after update_body(), so skipping one more
+        # keeps the same reach behind the head.
+        if not game_over and snake_body.hits_path(prev, head, HEAD_RADIUS, skip=5):
+            game_over = True
+
+    state.score = score
+    state.game_over = game_over
+
+    # ---- GAME OVER ----
+    if game_over:
+        # Update high score ONLY if beaten
+        if score > state.high_score:
+            state.high_score = score
+        events.append(EV_GAME_OVER)
+
+    return events
@@ -1,30 +1,106 @@
-import cv2
+import numpy as np
+
+from .collision import swept_hits
+
+
+class SnakeBody:
+    """Snake segments, head first, in a growable float32 ring buffer.
+
+    Pushing a new head is O(1); the tail is dropped by shrinking the length.
+    With a grid, segments are marked occupied with the given clearance.
+    """
+
+    def __init__(self, points=(), capacity=64, grid=None, clearance=25):
+        self.grid = grid
+        self.clearance = clearance
+        points = list(points)
+        cap = max(capacity, 1)
+        while cap < len(points):
+            cap *= 2
+        self._buf = np.zeros((cap, 2), np.float32)
+        self._head = 0
+        self._len = 0
+        self.reset(points)
+
+    def __len__(self):
+        return self._len
+
+    def __iter__(self):
+        return iter(self.ordered())
+
+    @property
+    def capacity(self):
+        return len(self._buf)
+
+    def head(self):
+        return self._buf[self._head]
+
+    def push_front(self, pos):
+        if self._len == len(self._buf):
+            self._grow()
+        self._head = (self._head - 1) % len(self._buf)
+        self._buf[self._head] = pos
+        self._len += 1
+        if self.grid is not None:
+            # the stored float32 value, so truncate() removes the same cells
+            self.grid.add(self._buf[self._head], self.clearance)
+
+    def reset(self, points=()):
+        """Replaces every segment; the grid is assumed already cleared."""
+        self._len = 0
+        self._head = 0
+        for p in reversed(list(points)):
+            self.push_front(p)
+
+    def truncate(self, length):
+        length = min(self._len, max(length, 0))
+        if self.grid is not None:
+            cap = len(self._buf)
+            for i in range(length, self._len):
+                self.grid.remove(self._buf[(self._head + i) % cap], self.clearance)
+        self._len = length
+
+    def ordered(self, start=0):
+        """Copy of segments [start:] as an (n, 2) array, head first."""
+        parts = self._spans(start)
+        if len(parts) == 1:
+            return parts[0].copy()
+        return np.concatenate(parts)
+
+    def hits_path(self, p0, p1, radius, skip=0):
+        """True if any segment from index `skip` on is closer than radius
+        to some point of the segment p0 -> p1."""
+        for seg in self._spans(skip):
+            if len(seg) and swept_hits(p0, p1, seg, radius).any():
+                return True
+        return False
+
+    def _spans(self, start):
+        # Logical range [start, len) as at most two contiguous views
+        cap = len(self._buf)
+        count = max(self._len - start, 0)
+        first = (self._head + start) % cap
+        end = first + count
+        if end <= cap:
+            return [self._buf[first:end]]
+        return [self._buf[first:], self._buf[:end - cap]]
+
+    def _grow(self):
+        buf = np.zeros((len(self._buf) * 2, 2), np.float32)
+        buf[:self._len] = self.ordered()
+        self._buf = buf
+        self._head = 0
+
 
 def move_snake(snake_pos, target_x, target_y, smoothing):
     snake_pos[0] += (target_x - snake_pos[0]) * smoothing
     snake_pos[1] += (target_y - snake_pos[1]) * smoothing
 
 def update_body(snake_body, snake_pos, score):
-    snake_body.insert(0, list(snake_pos))
-    if len(snake_body) > score + 3:
-        snake_body.pop()
-
-def draw_snake(rgb, snake_body, colors, particle_list):
-    # particles from head
-    if snake_body:
-        head = snake_body[0]
-        particle_list.append([head[0], head[1], 15])
-
-    # draw particles
-    for p in particle_list[:]:
-        px, py, pr = p
-        cv2.circle(rgb, (int(px), int(py)), pr, colors["particle"], 1)
-        p[2] -= 1
-        if p[2] <= 0:
-            particle_list.remove(p)
-
-    # draw snake body
-    for i, block in enumerate(snake_body):
-        cv2.circle(rgb, (int(block[0]), int(block[1])), 15, colors["snake_body"], 2)
-        col = colors["snake_head"] if i == 0 else colors["snake_body"]
-        cv2.circle(rgb, (int(block[0]), int(block[1])), 10, col, -1)
+    snake_body.push_front(snake_pos)
+    snake_body.truncate(score + 3)
+
+def draw_snake(scene, snake_body, atlas):
+    body = atlas["snake_body"]
+    for i, (x, y) in enumerate(snake_body.ordered().tolist()):
+        scene.add(body if i else atlas["snake_head"], x, y)
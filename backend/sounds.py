@@ -1,14 +1,205 @@
-import streamlit as st
-
-SND_EAT_NORMAL = 1172
-SND_EAT_GOLD   = 1173
-SND_BOOST      = 1717
-SND_GAME_OVER  = 1389
-
-def play_sound(sound_id: int):
-    html = f"""
-    <audio autoplay>
-        <source src="https://assets.mixkit.co/sfx/preview/mixkit-{sound_id}.mp3" type="audio/mpeg">
-    </audio>
+import os
+import threading
+import time
+import wave
+from collections import deque
+
+import numpy as np
+
+SND_EAT_NORMAL = "eat_normal"
+SND_EAT_GOLD   = "eat_gold"
+SND_BOOST      = "boost"
+SND_GAME_OVER  = "game_over"
+
+# The game's clips ship with it in assets/sounds/ and are served by the
+# frame stream server, so sound never depends on the network at play time.
+# They are synthesized by synth_clips() (python -m backend.sounds).
+SOUND_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                         "assets", "sounds")
+CLIP_TYPE = "audio/wav"
+CLIPS = {
+    SND_EAT_NORMAL: "eat_normal.wav",
+    SND_EAT_GOLD: "eat_gold.wav",
+    SND_BOOST: "boost.wav",
+    SND_GAME_OVER: "game_over.wav",
+}
+SAMPLE_RATE = 22050
+
+_clip_data = {}
+
+
+def clip_bytes(name):
+    """Contents of a clip's file, read once per process; None if missing."""
+    data = _clip_data.get(name)
+    if data is None and name in CLIPS:
+        try:
+            with open(os.path.join(SOUND_DIR, CLIPS[name]), "rb") as f:
+                data = f.read()
+        except OSError:
+            return None
+        _clip_data[name] = data
+    return data
+
+
+def preload_clips():
+    """Reads every clip into memory; returns the names of missing ones."""
+    return [name for name in CLIPS if clip_bytes(name) is None]
+
+
+# -----------------------------------------------------------
+# CLIP SYNTHESIS
+# -----------------------------------------------------------
+def _tone(f0, f1, seconds, decay, harmonics=(1.0,)):
+    """A sweep from f0 to f1 Hz (exponential), fading out at `decay` per second."""
+    t = np.arange(int(seconds * SAMPLE_RATE)) / SAMPLE_RATE
+    freq = f0 * (f1 / f0) ** (t / seconds)
+    phase = 2 * np.pi * np.cumsum(freq) / SAMPLE_RATE
+    out = sum(a * np.sin(k * phase) for k, a in enumerate(harmonics, 1))
+    # a few ms of fade in and out, so notes don't click
+    envelope = np.minimum(np.minimum(t, seconds - t) / 0.005, 1.0) * np.exp(-decay * t)
+    return out * envelope
+
+
+def synth_clip(name):
+    """float32 samples in [-1, 1] for one of the CLIPS."""
+    if name == SND_EAT_NORMAL:
+        # short upward blip
+        out = _tone(520, 1040, 0.09, 30, (1.0, 0.3))
+    elif name == SND_EAT_GOLD:
+        # bright two-note chime, the second ringing over the first
+        first = _tone(1318.5, 1318.5, 0.35, 12, (1.0, 0.25, 0.1))
+        second = _tone(1975.5, 1975.5, 0.35, 10, (1.0, 0.25, 0.1))
+        lag = int(0.08 * SAMPLE_RATE)
+        out = np.zeros(lag + len(second))
+        out[:len(first)] += first
+        out[lag:] += second
+    elif name == SND_BOOST:
+        # rising whoosh: a sweep over band-limited noise
+        sweep = _tone(180, 1400, 0.4, 2.5, (1.0, 0.5, 0.25))
+        noise = np.random.default_rng(0).standard_normal(len(sweep))
+        noise = np.convolve(noise, np.ones(24) / 24, "same") * np.linspace(0.2, 1.0, len(sweep))
+        out = sweep + 0.6 * noise * np.exp(-2.5 * np.arange(len(sweep)) / SAMPLE_RATE)
+    elif name == SND_GAME_OVER:
+        # three falling notes, then a slide down
+        odd = (1.0, 0.0, 0.33, 0.0, 0.2)  # hollow, square-ish timbre
+        out = np.concatenate([_tone(f, f, 0.18, 6, odd) for f in (392.0, 329.6, 261.6)]
+                             + [_tone(261.6, 98.0, 0.5, 4, odd)])
+    else:
+        raise KeyError(name)
+    return (0.7 * out / np.abs(out).max()).astype(np.float32)
+
+
+def synth_clips(directory=SOUND_DIR):
+    """Writes every clip to directory as 16-bit mono WAV."""
+    os.makedirs(directory, exist_ok=True)
+    for name, file in CLIPS.items():
+        pcm = (synth_clip(name) * 32767).astype("<i2")
+        with wave.open(os.path.join(directory, file), "wb") as w:
+            w.setnchannels(1)
+            w.setsampwidth(2)
+            w.setframerate(SAMPLE_RATE)
+            w.writeframes(pcm.tobytes())
+        _clip_data.pop(name, None)
+
+
+# -----------------------------------------------------------
+# EVENT QUEUE
+# -----------------------------------------------------------
+class SoundChannel:
+    """Sound events for one player, batched per frame.
+
+    post() queues a clip; repeats of the same clip within `debounce`
+    seconds are dropped. flush() turns everything posted since the last
+    flush into one batch (each clip at most once), which listeners pick
+    up with next_batch().
     """
-    st.markdown(html, unsafe_allow_html=True)
+
+    def __init__(self, debounce=0.08, history=32, clock=time.monotonic):
+        self.debounce = debounce
+        self.clock = clock
+        self._pending = {}
+        self._last_played = {}
+        self._cond = threading.Condition()
+        self._batches = deque(maxlen=history)  # (seq, names)
+        self._seq = 0
+        self.posted = 0
+        self.dropped = 0
+
+    def post(self, name):
+        now = self.clock()
+        last = self._last_played.get(name)
+        if name in self._pending or (last is not None and now - last < self.debounce):
+            self.dropped += 1
+            return False
+        self._pending[name] = None
+        self._last_played[name] = now
+        self.posted += 1
+        return True
+
+    def flush(self):
+        if not self._pending:
+            return ()
+        names = tuple(self._pending)
+        self._pending.clear()
+        with self._cond:
+            self._seq += 1
+            self._batches.append((self._seq, names))
+            self._cond.notify_all()
+        return names
+
+    @property
+    def seq(self):
+        with self._cond:
+            return self._seq
+
+    def next_batch(self, last_seq=0, timeout=None):
+        """(seq, clip names) of every batch newer than last_seq, or (last_seq, ())."""
+        with self._cond:
+            if not self._cond.wait_for(lambda: self._seq > last_seq, timeout):
+                return last_seq, ()
+            names = {}
+            for seq, batch in self._batches:
+                if seq > last_seq:
+                    names.update(dict.fromkeys(batch))
+            return self._seq, tuple(names)
+
+
+# -----------------------------------------------------------
+# BROWSER PLAYER
+# -----------------------------------------------------------
+def player_html(events_url, clips_url):
+    """One persistent Web Audio player: decodes every clip once, then plays
+    each batch pushed on the event stream."""
+    files = ",".join(f'["{n}", "{f}"]' for n, f in CLIPS.items())
+    return f"""
+<script>
+const ctx = new (window.AudioContext || window.webkitAudioContext)();
+const buffers = {{}};
+for (const [name, file] of [{files}]) {{
+  fetch("{clips_url}" + file)
+    .then(r => r.arrayBuffer())
+    .then(b => ctx.decodeAudioData(b))
+    .then(buf => {{ buffers[name] = buf; }})
+    .catch(() => {{}});  // a missing clip just stays silent
+}}
+const resume = () => {{ if (ctx.state === "suspended") ctx.resume(); }};
+document.addEventListener("pointerdown", resume);
+new EventSource("{events_url}").onmessage = (e) => {{
+  resume();
+  for (const name of e.data.split(",")) {{
+    const buf = buffers[name];
+    if (!buf) continue;
+    const src = ctx.createBufferSource();
+    src.buffer = buf;
+    src.connect(ctx.destination);
+    src.start();
+  }}
+}};
+</script>
+"""
+
+
+if __name__ == "__main__":
+    synth_clips()
+    missing = preload_clips()
+    print("missing clips:", ", ".join(missing) if missing else "none")
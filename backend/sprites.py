@@ -0,0 +1,172 @@
+import threading
+from collections import OrderedDict
+from functools import lru_cache
+
+import cv2
+import numpy as np
+
+from .theme import get_theme_colors
+
+MAX_ATLASES = 8
+MAX_TEXTS = 512
+
+OBSTACLE_COLOR = (140, 140, 140)
+BLUE_FOOD_COLOR = (0, 128, 255)
+INVISIBLE_COLOR = (255, 255, 255)
+
+
+class Sprite:
+    """Pre-rasterized tile plus the mask of pixels it covers."""
+
+    __slots__ = ("tile", "mask", "cx", "cy", "w", "h")
+
+    def __init__(self, circles):
+        # circles: [(radius, color, thickness), ...] drawn in order
+        pad = max(r + max(t, 1) for r, _, t in circles)
+        size = 2 * pad + 1
+        self.tile = np.zeros((size, size, 3), np.uint8)
+        mask = np.zeros((size, size), np.uint8)
+        for r, col, t in circles:
+            cv2.circle(self.tile, (pad, pad), r, col, t)
+            cv2.circle(mask, (pad, pad), r, 255, t)
+        self.mask = mask
+        self.cx = self.cy = pad
+        self.w = self.h = size
+
+    def blit(self, dst, x, y):
+        """Copies the covered pixels into dst, centred on (x, y), clipped."""
+        h, w = self.h, self.w
+        x0 = int(x) - self.cx
+        y0 = int(y) - self.cy
+        dx0, dy0 = max(x0, 0), max(y0, 0)
+        dx1, dy1 = min(x0 + w, dst.shape[1]), min(y0 + h, dst.shape[0])
+        if dx0 >= dx1 or dy0 >= dy1:
+            return
+        sx0, sy0 = dx0 - x0, dy0 - y0
+        sx1, sy1 = sx0 + dx1 - dx0, sy0 + dy1 - dy0
+        # cv2.copyTo writes straight into the dst view
+        cv2.copyTo(self.tile[sy0:sy1, sx0:sx1], self.mask[sy0:sy1, sx0:sx1],
+                   dst[dy0:dy1, dx0:dx1])
+
+
+class TextSprite(Sprite):
+    """cv2.putText() output rasterized once; (x, y) is the text origin."""
+
+    __slots__ = ()
+
+    def __init__(self, text, scale, color, thickness=1, font=cv2.FONT_HERSHEY_SIMPLEX):
+        (tw, th), baseline = cv2.getTextSize(text, font, scale, thickness)
+        pad = thickness + 2
+        self.h, self.w = th + baseline + 2 * pad, tw + 2 * pad
+        self.tile = np.zeros((self.h, self.w, 3), np.uint8)
+        self.mask = np.zeros((self.h, self.w), np.uint8)
+        self.cx, self.cy = pad, pad + th
+        cv2.putText(self.tile, text, (self.cx, self.cy), font, scale, color, thickness)
+        cv2.putText(self.mask, text, (self.cx, self.cy), font, scale, 255, thickness)
+
+
+class BoxSprite(Sprite):
+    """Filled w x h rectangle; (x, y) is its top-left corner."""
+
+    __slots__ = ()
+
+    def __init__(self, w, h, color):
+        self.w, self.h = w, h
+        self.tile = np.empty((h, w, 3), np.uint8)
+        self.tile[:] = color
+        self.mask = np.full((h, w), 255, np.uint8)
+        self.cx = self.cy = 0
+
+
+@lru_cache(maxsize=MAX_TEXTS)
+def text_sprite(text, scale, color, thickness=1, font=cv2.FONT_HERSHEY_SIMPLEX):
+    return TextSprite(text, scale, color, thickness, font)
+
+
+@lru_cache(maxsize=64)
+def box_sprite(w, h, color):
+    return BoxSprite(w, h, color)
+
+
+class Scene:
+    """What to draw over the static layer, as (sprite, x, y) in draw order.
+
+    The draw_* helpers fill one in; render() blits it all, the
+    compositor (backend.compositor) only the parts that changed.
+    """
+
+    __slots__ = ("items",)
+
+    def __init__(self):
+        self.items = []
+
+    def add(self, sprite, x, y):
+        self.items.append((sprite, int(x), int(y)))
+
+    def text(self, text, org, scale, color, thickness=1):
+        """cv2.putText() equivalent, from a cached raster."""
+        self.items.append((text_sprite(text, scale, color, thickness), org[0], org[1]))
+
+    def box(self, p0, p1, color):
+        """Filled cv2.rectangle() equivalent (p1 inclusive)."""
+        self.items.append((box_sprite(p1[0] - p0[0] + 1, p1[1] - p0[1] + 1, color),
+                           p0[0], p0[1]))
+
+    def draw(self, rgb):
+        for sprite, x, y in self.items:
+            sprite.blit(rgb, x, y)
+
+
+class SpriteAtlas:
+    """Every game sprite for one theme, rasterized once."""
+
+    def __init__(self, theme_name):
+        colors = get_theme_colors(theme_name)
+        self.colors = colors
+        self.sprites = {
+            "snake_head": Sprite([(15, colors["snake_body"], 2), (10, colors["snake_head"], -1)]),
+            "snake_body": Sprite([(15, colors["snake_body"], 2), (10, colors["snake_body"], -1)]),
+            "food_normal": Sprite([(10, colors["food_normal"], -1)]),
+            "food_gold": Sprite([(10, colors["food_gold"], -1)]),
+            "blue_food": Sprite([(10, BLUE_FOOD_COLOR, -1)]),
+            "invisible": Sprite([(10, INVISIBLE_COLOR, 2)]),
+            "boss": Sprite([(60, colors["boss"], -1), (80, colors["boss"], 3)]),
+        }
+        self._circles = {}
+        self._lock = threading.Lock()
+
+    def __getitem__(self, name):
+        return self.sprites[name]
+
+    def circle(self, radius, color, thickness=-1):
+        """Sprite for a plain circle, built on first use (obstacles, particles)."""
+        key = (int(radius), tuple(int(c) for c in color), thickness)
+        sprite = self._circles.get(key)
+        if sprite is None:
+            sprite = Sprite([key])
+            with self._lock:
+                self._circles[key] = sprite
+        return sprite
+
+    def add(self, scene, name, x, y):
+        scene.add(self.sprites[name], x, y)
+
+
+_atlases = OrderedDict()
+_lock = threading.Lock()
+
+
+def get_atlas(theme_name):
+    with _lock:
+        atlas = _atlases.get(theme_name)
+        if atlas is not None:
+            _atlases.move_to_end(theme_name)
+            return atlas
+
+    atlas = SpriteAtlas(theme_name)
+
+    with _lock:
+        _atlases[theme_name] = atlas
+        while len(_atlases) > MAX_ATLASES:
+            _atlases.popitem(last=False)
+    return atlas
@@ -0,0 +1,189 @@
+import struct
+
+import numpy as np
+
+from .grid import OccupancyGrid
+from .snake import SnakeBody
+from .particles import ParticlePool
+from .boss import BOSS_CLEARANCE
+
+FOOD_RADIUS = 10
+
+_MAGIC = b"SNK1"
+# width, height, score, high_score, level, flags,
+# sim_time, speed_boost_timer, invisible_timer, last_tick
+_SCALARS = struct.Struct("<4sHHiiiHdddd")
+_FLAGS = ("game_started", "game_over", "board_full", "speed_boost_active",
+          "invisible_active", "boss_active")
+_HAS_BLUE, _HAS_INVISIBLE, _FOOD_GOLD = 1 << 8, 1 << 9, 1 << 10
+
+
+class GameState:
+    """Everything one game needs, in fixed slots with NumPy coordinates.
+
+    reset() starts a new round in place (keeping high_score and reusing
+    the buffers), snapshot()/restore() make cheap in-memory checkpoints
+    and to_bytes()/from_bytes() give a compact serialized form. The
+    occupancy grid and particles are derived data and are not serialized.
+    """
+
+    __slots__ = (
+        "width", "height", "theme_name", "grid",
+        "snake_pos", "snake_body", "score", "high_score",
+        "food_pos", "food_kind",
+        "game_started", "game_over", "board_full", "level", "sim_time", "last_tick",
+        "obstacles", "obstacle_vel",
+        "blue_food_pos", "speed_boost_active", "speed_boost_timer",
+        "invisible_food_pos", "invisible_active", "invisible_timer",
+        "boss_active", "boss_pos",
+        "particles",
+    )
+
+    def __init__(self, width, height, theme_name="Neon"):
+        self.width = width
+        self.height = height
+        self.theme_name = theme_name
+        # Everything that moves keeps this grid current so food can be
+        # placed on a free cell without scanning the board.
+        self.grid = OccupancyGrid(width, height)
+        self.snake_body = SnakeBody(grid=self.grid)
+        self.particles = ParticlePool.from_preset(theme_name)
+        self.snake_pos = np.zeros(2)
+        self.food_pos = np.zeros(2)
+        self.boss_pos = np.zeros(2)
+        self.high_score = 0  # NEVER reset unless exceeded
+        self.reset()
+
+    def reset(self):
+        """Fresh round; keeps high_score, theme and allocated buffers."""
+        w, h = self.width, self.height
+        self.grid.clear()
+        self.snake_pos[:] = (100.0, 50.0)
+        self.snake_body.reset([[100.0, 50.0], [90.0, 50.0], [80.0, 50.0]])
+        self.score = 0
+        self.food_pos[:] = (w // 2, h // 2)
+        self.grid.add(self.food_pos, FOOD_RADIUS)
+        self.food_kind = "normal"
+        self.game_started = False
+        self.game_over = False
+        self.board_full = False
+        self.level = 1
+        self.sim_time = 0.0
+        self.last_tick = None
+
+        # Obstacles: rows of (x, y, r) and (vx, vy)
+        self.obstacles = np.array([
+            [w // 2, h // 3, 25],
+            [w // 3, 2 * h // 3, 25],
+            [2 * w // 3, h // 2, 25],
+        ], np.float64)
+        self.obstacle_vel = np.array([[2, 2], [-2, 2], [2, -2]], np.float64)
+        for ox, oy, r in self.obstacles:
+            self.grid.add((ox, oy), r + FOOD_RADIUS)
+
+        # Power-ups (timers hold the simulated seconds left)
+        self.blue_food_pos = None
+        self.speed_boost_active = False
+        self.speed_boost_timer = 0.0
+        self.invisible_food_pos = None
+        self.invisible_active = False
+        self.invisible_timer = 0.0
+
+        # Boss
+        self.boss_active = False
+        self.boss_pos[:] = (w // 2, h // 2)
+
+        self.particles.clear()
+
+    # ---- checkpoints ----
+    def snapshot(self):
+        """Independent copy sharing nothing mutable with this state."""
+        return GameState.from_bytes(self.to_bytes())
+
+    def restore(self, snap):
+        """Copies a snapshot back into this state, reusing its buffers."""
+        self._load(snap.to_bytes())
+
+    def to_bytes(self):
+        flags = sum(1 << i for i, name in enumerate(_FLAGS) if getattr(self, name))
+        if self.blue_food_pos is not None:
+            flags |= _HAS_BLUE
+        if self.invisible_food_pos is not None:
+            flags |= _HAS_INVISIBLE
+        if self.food_kind == "gold":
+            flags |= _FOOD_GOLD
+
+        theme = self.theme_name.encode()
+        points = np.array([
+            self.snake_pos, self.food_pos, self.boss_pos,
+            self.blue_food_pos if self.blue_food_pos is not None else (0, 0),
+            self.invisible_food_pos if self.invisible_food_pos is not None else (0, 0),
+        ], np.float64)
+        body = self.snake_body.ordered()
+        return b"".join([
+            _SCALARS.pack(_MAGIC, self.width, self.height, self.score, self.high_score,
+                          self.level, flags, self.sim_time, self.speed_boost_timer,
+                          self.invisible_timer,
+                          float("nan") if self.last_tick is None else self.last_tick),
+            struct.pack("<BHI", len(theme), len(self.obstacles), len(body)),
+            theme,
+            points.tobytes(),
+            self.obstacles.astype(np.float64).tobytes(),
+            self.obstacle_vel.astype(np.float64).tobytes(),
+            body.astype(np.float32).tobytes(),
+        ])
+
+    @classmethod
+    def from_bytes(cls, data):
+        head = _SCALARS.unpack_from(data)
+        if head[0] != _MAGIC:
+            raise ValueError("not a serialized GameState")
+        n_theme = data[_SCALARS.size]
+        theme = bytes(data[_SCALARS.size + 7:_SCALARS.size + 7 + n_theme]).decode()
+        state = cls(head[1], head[2], theme)
+        state._load(data)
+        return state
+
+    def _load(self, data):
+        (_, self.width, self.height, self.score, self.high_score, self.level, flags,
+         self.sim_time, self.speed_boost_timer, self.invisible_timer,
+         last_tick) = _SCALARS.unpack_from(data)
+        self.last_tick = None if last_tick != last_tick else last_tick
+
+        off = _SCALARS.size
+        n_theme, n_obs, n_body = struct.unpack_from("<BHI", data, off)
+        off += 7
+        self.theme_name = bytes(data[off:off + n_theme]).decode()
+        off += n_theme
+
+        def take(dtype, count, shape):
+            nonlocal off
+            arr = np.frombuffer(data, dtype, count, off).reshape(shape).copy()
+            off += arr.nbytes
+            return arr
+
+        points = take(np.float64, 10, (5, 2))
+        self.obstacles = take(np.float64, n_obs * 3, (n_obs, 3))
+        self.obstacle_vel = take(np.float64, n_obs * 2, (n_obs, 2))
+        body = take(np.float32, n_body * 2, (n_body, 2))
+
+        for i, name in enumerate(_FLAGS):
+            setattr(self, name, bool(flags & (1 << i)))
+        self.food_kind = "gold" if flags & _FOOD_GOLD else "normal"
+        self.snake_pos[:] = points[0]
+        self.food_pos[:] = points[1]
+        self.boss_pos[:] = points[2]
+        self.blue_food_pos = points[3].copy() if flags & _HAS_BLUE else None
+        self.invisible_food_pos = points[4].copy() if flags & _HAS_INVISIBLE else None
+
+        # Derived data: rebuild the grid from the entities
+        self.grid.clear()
+        self.snake_body.reset(body)
+        for pos in (self.food_pos, self.blue_food_pos, self.invisible_food_pos):
+            if pos is not None:
+                self.grid.add(pos, FOOD_RADIUS)
+        for ox, oy, r in self.obstacles:
+            self.grid.add((ox, oy), r + FOOD_RADIUS)
+        if self.boss_active:
+            self.grid.add(self.boss_pos, BOSS_CLEARANCE)
+        self.particles.clear()
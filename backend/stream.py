@@ -0,0 +1,362 @@
+import re
+import struct
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import cv2
+import numpy as np
+
+from .profiling import profiler
+from .sounds import CLIPS, CLIP_TYPE, SoundChannel, clip_bytes, preload_clips
+
+BOUNDARY = b"frame"
+# 4:2:0 JPEG works in 16x16 blocks, so strips are multiples of 16 rows
+MCU = 16
+_RST = re.compile(rb"\xff[\xd0-\xd7]")
+
+
+class StreamChannel:
+    """Newest frame of one stream, JPEG-encoded at most once.
+
+    publish() copies (or downscales) the frame into one of three buffers
+    of its own, never the newest one or the one being encoded, so the
+    caller may reuse its buffer right away. Only one thread may publish
+    to a channel. Encoding happens on the first client request for that
+    frame and is shared by every client. Clients always jump to the
+    newest frame, so frames a browser has not consumed yet are dropped
+    instead of queued.
+
+    With `strip` (rows, a multiple of 16) frames are encoded in horizontal
+    strips, each its own JPEG restart interval: publish() is told which
+    rects changed, and only the strips under them are encoded again,
+    then spliced with the cached rest into one baseline JPEG. A frame
+    published with no changes at all isn't sent again.
+    """
+
+    def __init__(self, max_fps=None, scale=1.0, quality=80, channels="RGB", strip=None):
+        self.set_max_fps(max_fps)
+        self.scale = scale
+        self.quality = quality
+        self.channels = channels
+        if strip is not None and (scale != 1.0 or strip % MCU):
+            raise ValueError(f"strip encoding needs scale 1.0 and a multiple of {MCU} rows")
+        self.strip = strip
+        self._dirty = None     # strips changed since the last encode; None = all
+        self._pending = set()  # strips changed by frames not published yet
+        self._segments = []    # per strip: entropy-coded data, or None
+        self._header = None
+        self._shape = None
+
+        self._cond = threading.Condition()
+        self._frame = None
+        self._encoding = None  # frame being encoded
+        self._bufs = [None] * 3
+        self._seq = 0
+        self._last_publish = 0.0
+        self._encode_lock = threading.Lock()
+        self._jpeg = None
+        self._jpeg_seq = 0
+        self.published = 0
+        self.encoded = 0
+
+    def set_max_fps(self, max_fps):
+        """Caps how often publish() accepts a frame; None for no cap."""
+        self.min_interval = 1.0 / max_fps if max_fps else 0.0
+
+    def publish(self, img, dirty=None):
+        """Offers a new frame; dirty lists the (x0, y0, x1, y1) rects that
+        changed since the last frame (None: assume everything did)."""
+        now = time.monotonic()
+        if self.strip is not None:
+            # changes of frames the fps cap drops carry over to the next one
+            changed = self._strips(img.shape, dirty)
+            if changed is None or self._pending is None:
+                self._pending = None
+            else:
+                self._pending |= changed
+            if self._pending is not None and not self._pending and self._frame is not None:
+                return False
+        if now - self._last_publish < self.min_interval:
+            return False
+        with self._cond:
+            i = next(i for i, buf in enumerate(self._bufs)
+                     if buf is None or (buf is not self._frame and buf is not self._encoding))
+        h, w = img.shape[:2]
+        if self.scale != 1.0:
+            h, w = round(h * self.scale), round(w * self.scale)
+        buf = self._bufs[i]
+        if buf is None or buf.shape != (h, w) + img.shape[2:]:
+            buf = self._bufs[i] = np.empty((h, w) + img.shape[2:], img.dtype)
+        if self.scale != 1.0:
+            cv2.resize(img, (w, h), dst=buf, interpolation=cv2.INTER_AREA)
+        else:
+            np.copyto(buf, img)
+        img = buf
+        with self._cond:
+            # the frame and the strips it changed go in together, so
+            # next_jpeg() never sees one without the other
+            if self.strip is not None:
+                if self._pending is None or self._dirty is None:
+                    self._dirty = None
+                else:
+                    self._dirty |= self._pending
+                self._pending = set()
+            self._frame = img
+            self._seq += 1
+            self._last_publish = now
+            self.published += 1
+            self._cond.notify_all()
+        return True
+
+    def next_jpeg(self, last_seq=0, timeout=None):
+        """(seq, jpeg bytes) for a frame newer than last_seq, or (last_seq, None)."""
+        with self._cond:
+            if not self._cond.wait_for(lambda: self._seq > last_seq, timeout):
+                return last_seq, None
+
+        # Encode outside _cond so publish() never waits on a JPEG encode
+        with self._encode_lock:
+            with self._cond:
+                # newest frame and every change up to it, together
+                seq, frame, dirty = self._seq, self._frame, self._dirty
+                if self._jpeg_seq < seq:
+                    self._dirty = set()
+                    self._encoding = frame  # publish() leaves it alone
+            if self._jpeg_seq < seq:
+                try:
+                    with profiler.span("encode"):
+                        if self.strip is not None:
+                            self._jpeg = self._encode_strips(frame, dirty)
+                        else:
+                            self._jpeg = self._encode(frame)
+                finally:
+                    with self._cond:
+                        self._encoding = None
+                self._jpeg_seq = seq
+                self.encoded += 1
+            return self._jpeg_seq, self._jpeg
+
+    def _encode(self, img):
+        if self.channels == "RGB":
+            img = cv2.cvtColor(img, cv2.COLOR_RGB2BGR)
+        ok, buf = cv2.imencode(".jpg", img, [cv2.IMWRITE_JPEG_QUALITY, self.quality])
+        return buf.tobytes() if ok else None
+
+    # ---- strip encoding ----
+    def _strips(self, shape, rects):
+        """Strips under rects in a frame of this shape; None for all."""
+        if rects is None:
+            return None
+        n = -(-shape[0] // self.strip)
+        strips = set()
+        for _, y0, _, y1 in rects:
+            strips.update(range(max(y0 // self.strip, 0), min(-(-y1 // self.strip), n)))
+        return strips
+
+    def _encode_strips(self, img, dirty):
+        if img.shape != self._shape:
+            self._shape = img.shape
+            self._segments = [None] * -(-img.shape[0] // self.strip)
+            self._header = None
+        segments = self._segments
+        todo = [i for i, seg in enumerate(segments)
+                if seg is None or dirty is None or i in dirty]
+        # runs of adjacent strips are encoded together, one restart interval each
+        runs = []
+        for i in todo:
+            if runs and runs[-1][1] == i:
+                runs[-1][1] = i + 1
+            else:
+                runs.append([i, i + 1])
+
+        h, w = img.shape[:2]
+        params = [cv2.IMWRITE_JPEG_QUALITY, self.quality,
+                  cv2.IMWRITE_JPEG_SAMPLING_FACTOR, cv2.IMWRITE_JPEG_SAMPLING_FACTOR_420,
+                  cv2.IMWRITE_JPEG_RST_INTERVAL, -(-w // MCU) * (self.strip // MCU)]
+        for first, end in runs:
+            part = img[first * self.strip:min(end * self.strip, h)]
+            if self.channels == "RGB":
+                part = cv2.cvtColor(part, cv2.COLOR_RGB2BGR)
+            ok, buf = cv2.imencode(".jpg", part, params)
+            if not ok:
+                return None
+            header, parts = _split_scan(buf.tobytes())
+            if len(parts) != end - first:
+                return None
+            segments[first:end] = parts
+            if self._header is None:
+                self._header = _with_height(header, h)
+
+        out = [self._header]
+        for i, seg in enumerate(segments):
+            if i:
+                out.append(b"\xff" + bytes((0xD0 + (i - 1) % 8,)))  # RSTn
+            out.append(seg)
+        out.append(b"\xff\xd9")
+        return b"".join(out)
+
+
+def _split_scan(jpeg):
+    """(headers through SOS, [entropy-coded data per restart interval])."""
+    i = 2
+    while True:
+        marker = jpeg[i + 1]
+        length = struct.unpack_from(">H", jpeg, i + 2)[0]
+        i += 2 + length
+        if marker == 0xDA:
+            break
+    # inside scan data a 0xFF byte is stuffed (FF 00) unless it starts a marker
+    return jpeg[:i], _RST.split(jpeg[i:-2])  # up to EOI
+
+
+def _with_height(header, height):
+    """header with the frame height in SOF0 replaced."""
+    header = bytearray(header)
+    i = 2
+    while header[i + 1] != 0xC0:
+        i += 2 + struct.unpack_from(">H", header, i + 2)[0]
+    struct.pack_into(">H", header, i + 5, height)
+    return bytes(header)
+
+
+class FrameStreamServer:
+    """Serves every channel as an MJPEG stream at /<name>.mjpg.
+
+    Sound channels are served as server-sent events at /<name>.events,
+    and the clips they refer to from memory at /sounds/<file>.
+    """
+
+    def __init__(self, host="0.0.0.0", port=8765):
+        self.host = host
+        self.port = port
+        self.channels = {}
+        self.sound_channels = {}
+        self._httpd = None
+        self._thread = None
+
+    def channel(self, name, **kwargs):
+        ch = self.channels.get(name)
+        if ch is None:
+            ch = self.channels[name] = StreamChannel(**kwargs)
+        return ch
+
+    def remove_channel(self, name):
+        self.channels.pop(name, None)
+
+    def sound_channel(self, name, **kwargs):
+        ch = self.sound_channels.get(name)
+        if ch is None:
+            ch = self.sound_channels[name] = SoundChannel(**kwargs)
+        return ch
+
+    def remove_sound_channel(self, name):
+        self.sound_channels.pop(name, None)
+
+    def publish(self, name, img, dirty=None):
+        ch = self.channels.get(name)
+        return ch.publish(img, dirty) if ch is not None else False
+
+    def start(self):
+        if self._httpd is not None:
+            return self
+        preload_clips()
+        self._httpd = ThreadingHTTPServer((self.host, self.port), _make_handler(self))
+        self._httpd.daemon_threads = True
+        self._thread = threading.Thread(target=self._httpd.serve_forever,
+                                        name="frame-stream", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        if self._httpd is not None:
+            self._httpd.shutdown()
+            self._httpd.server_close()
+            self._httpd = None
+
+    def url(self, name, host="localhost"):
+        return f"http://{host}:{self.port}/{name}.mjpg"
+
+    def events_url(self, name, host="localhost"):
+        return f"http://{host}:{self.port}/{name}.events"
+
+    def clips_url(self, host="localhost"):
+        return f"http://{host}:{self.port}/sounds/"
+
+
+def _make_handler(server):
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            name = self.path.lstrip("/").split("?")[0]
+            if name.startswith("sounds/"):
+                self._send_clip(name[7:])
+                return
+            if name.endswith(".events"):
+                self._send_events(name[:-7])
+                return
+            if not name.endswith(".mjpg") or name[:-5] not in server.channels:
+                self.send_error(404)
+                return
+
+            ch = server.channels[name[:-5]]
+            self.send_response(200)
+            self.send_header("Content-Type", "multipart/x-mixed-replace; boundary=" + BOUNDARY.decode())
+            self.send_header("Cache-Control", "no-cache, private")
+            self.send_header("Access-Control-Allow-Origin", "*")
+            self.end_headers()
+
+            seq = 0
+            try:
+                while name[:-5] in server.channels:
+                    seq, jpeg = ch.next_jpeg(seq, timeout=1.0)
+                    if jpeg is None:
+                        continue
+                    self.wfile.write(b"--" + BOUNDARY + b"\r\n"
+                                     b"Content-Type: image/jpeg\r\n"
+                                     b"Content-Length: " + str(len(jpeg)).encode() + b"\r\n\r\n")
+                    self.wfile.write(jpeg)
+                    self.wfile.write(b"\r\n")
+            except (BrokenPipeError, ConnectionResetError):
+                pass
+
+        def _send_clip(self, file):
+            clip = next((n for n, f in CLIPS.items() if f == file), None)
+            data = clip_bytes(clip)
+            if data is None:
+                self.send_error(404)
+                return
+            self.send_response(200)
+            self.send_header("Content-Type", CLIP_TYPE)
+            self.send_header("Content-Length", str(len(data)))
+            self.send_header("Cache-Control", "max-age=86400")
+            self.send_header("Access-Control-Allow-Origin", "*")
+            self.end_headers()
+            self.wfile.write(data)
+
+        def _send_events(self, name):
+            ch = server.sound_channels.get(name)
+            if ch is None:
+                self.send_error(404)
+                return
+            self.send_response(200)
+            self.send_header("Content-Type", "text/event-stream")
+            self.send_header("Cache-Control", "no-cache")
+            self.send_header("Access-Control-Allow-Origin", "*")
+            self.end_headers()
+
+            seq = ch.seq  # only sounds from now on
+            try:
+                while name in server.sound_channels:
+                    seq, names = ch.next_batch(seq, timeout=10.0)
+                    if names:
+                        self.wfile.write(b"data: " + ",".join(names).encode() + b"\n\n")
+                    else:
+                        self.wfile.write(b": keepalive\n\n")
+                    self.wfile.flush()
+            except (BrokenPipeError, ConnectionResetError):
+                pass
+
+        def log_message(self, *args):
+            pass
+
+    return Handler
@@ -0,0 +1,142 @@
+from collections import namedtuple
+
+import cv2
+import numpy as np
+
+# Minimal stand-ins for MediaPipe's result objects; engine only ever reads
+# results.multi_hand_landmarks[i].landmark[j].x / .y
+Landmark = namedtuple("Landmark", "x y z")
+HandLandmarks = namedtuple("HandLandmarks", "landmark")
+HandResults = namedtuple("HandResults", "multi_hand_landmarks")
+
+NO_HANDS = HandResults([])
+
+
+def fingertip_from_results(results, width, height):
+    """Index fingertip (landmark 8) in pixels, or None without a hand."""
+    if not results.multi_hand_landmarks:
+        return None
+    lm = results.multi_hand_landmarks[0].landmark[8]
+    return int(lm.x * width), int(lm.y * height)
+
+
+def _to_hand(landmarks, x0=0.0, y0=0.0, sx=1.0, sy=1.0):
+    # Map crop-normalised landmarks back to full-frame normalised coords
+    return HandLandmarks([Landmark(x0 + lm.x * sx, y0 + lm.y * sy, lm.z) for lm in landmarks])
+
+
+class HandTracker:
+    """Schedules MediaPipe Hands runs to spend as little CPU as possible.
+
+    - full detection runs on a downscaled copy of the frame, and only while
+      no hand is being tracked;
+    - while tracking, the model sees a square crop around the last hand;
+    - with every_n > 1 the model runs on every Nth frame only and the hand
+      is extrapolated from the last two measurements in between.
+
+    process() takes an RGB frame of any size and returns results with
+    landmarks normalised to that frame, like hands.process() does.
+
+    Build hands with static_image_mode=True. The model sees downscaled
+    frames and crops that move from call to call, so MediaPipe's own
+    tracking would carry a landmark ROI from different image coordinates
+    into the next call. This class takes over that tracking.
+    """
+
+    def __init__(self, hands, detect_width=320, roi_size=224, roi_scale=2.2, every_n=1):
+        self.hands = hands
+        self.detect_width = detect_width
+        self.roi_size = roi_size
+        self.roi_scale = roi_scale
+        self.every_n = max(int(every_n), 1)
+
+        self._frame = 0
+        self._hand = None          # last measured HandLandmarks
+        self._prev_tip = None      # fingertip of the measurement before
+        self._gap = 1              # frames between those two measurements
+        self._since = 0            # frames since the last measurement
+        self._detect_buf = None
+        self._roi_buf = None
+        self.stats = {"detect": 0, "roi": 0, "skipped": 0, "lost": 0}
+
+    def reset(self):
+        self._hand = None
+        self._prev_tip = None
+        self._since = 0
+
+    def process(self, rgb):
+        self._frame += 1
+
+        if self._hand is not None and self._frame % self.every_n:
+            self._since += 1
+            self.stats["skipped"] += 1
+            return HandResults([self._extrapolate()])
+
+        hand = None
+        if self._hand is not None:
+            hand = self._track(rgb)
+            if hand is None:
+                self.stats["lost"] += 1
+        if hand is None:
+            hand = self._detect(rgb)
+
+        if hand is None:
+            self.reset()
+            return NO_HANDS
+
+        self._prev_tip = None if self._hand is None else self._hand.landmark[8]
+        self._gap = self._since + 1
+        self._hand = hand
+        self._since = 0
+        return HandResults([hand])
+
+    # ---- stages ----
+    def _detect(self, rgb):
+        self.stats["detect"] += 1
+        h, w = rgb.shape[:2]
+        dw = min(self.detect_width, w)
+        dh = int(round(h * dw / w))
+        if self._detect_buf is None or self._detect_buf.shape[:2] != (dh, dw):
+            self._detect_buf = np.empty((dh, dw, 3), rgb.dtype)
+        small = cv2.resize(rgb, (dw, dh), dst=self._detect_buf, interpolation=cv2.INTER_AREA)
+
+        results = self.hands.process(small)
+        if not results.multi_hand_landmarks:
+            return None
+        # Same aspect ratio, so normalised coordinates carry over as-is
+        return _to_hand(results.multi_hand_landmarks[0].landmark)
+
+    def _track(self, rgb):
+        self.stats["roi"] += 1
+        h, w = rgb.shape[:2]
+        xs = [lm.x * w for lm in self._hand.landmark]
+        ys = [lm.y * h for lm in self._hand.landmark]
+        side = int(max(max(xs) - min(xs), max(ys) - min(ys)) * self.roi_scale)
+        side = min(max(side, self.roi_size), w, h)
+        cx = (max(xs) + min(xs)) / 2
+        cy = (max(ys) + min(ys)) / 2
+        x0 = int(min(max(cx - side / 2, 0), w - side))
+        y0 = int(min(max(cy - side / 2, 0), h - side))
+
+        crop = rgb[y0:y0 + side, x0:x0 + side]
+        if side != self.roi_size:
+            if self._roi_buf is None:
+                self._roi_buf = np.empty((self.roi_size, self.roi_size, 3), rgb.dtype)
+            crop = cv2.resize(crop, (self.roi_size, self.roi_size), dst=self._roi_buf,
+                              interpolation=cv2.INTER_AREA)
+
+        results = self.hands.process(crop)
+        if not results.multi_hand_landmarks:
+            return None
+        return _to_hand(results.multi_hand_landmarks[0].landmark,
+                        x0 / w, y0 / h, side / w, side / h)
+
+    def _extrapolate(self):
+        # Shift the whole hand by the fingertip's per-frame velocity
+        if self._prev_tip is None:
+            return self._hand
+        tip = self._hand.landmark[8]
+        k = self._since / self._gap
+        dx = (tip.x - self._prev_tip.x) * k
+        dy = (tip.y - self._prev_tip.y) * k
+        return _to_hand(self._hand.landmark, dx, dy)
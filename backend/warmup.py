@@ -0,0 +1,146 @@
+import importlib
+import threading
+import time
+import weakref
+
+# Imported by the warm-up thread so the first game page does not pay for them.
+# Nothing heavy is imported at the top of this module on purpose.
+HEAVY_MODULES = (
+    "numpy", "cv2", "mediapipe",
+    "backend.capture", "backend.engine", "backend.pipeline", "backend.tracking",
+    "backend.inference", "backend.stream",
+)
+
+
+class Warmup:
+    """Opens the camera and loads the hand model in a background thread.
+
+    open_capture() -> opened capture device
+    make_hands() -> hand model with process(rgb), or None to skip it
+
+    ready is set once everything is done (or failed, see .error).
+    phases holds the seconds each warm-up step took; marks holds seconds
+    since start() for milestones such as "ready", "start" (the player
+    pressed START) and "first_frame" (the first playable frame).
+
+    The camera and model stay open for whoever takes them over until
+    close(), which releases both. A Warmup that is dropped without it
+    (a reloaded or abandoned browser tab ends its Streamlit session)
+    releases them when it is garbage collected.
+    """
+
+    def __init__(self, open_capture, make_hands=None, modules=HEAVY_MODULES,
+                 warm_frames=3, clock=time.monotonic):
+        self.open_capture = open_capture
+        self.make_hands = make_hands
+        self.modules = modules
+        self.warm_frames = warm_frames
+        self.clock = clock
+
+        self.ready = threading.Event()
+        self.error = None
+        self.cap = None
+        self.hands = None
+        self.phases = {}
+        self.marks = {}
+        self.started_at = None
+        self._thread = None
+        self._held = []
+        # must not refer to self, or the Warmup would never be collected
+        self._finalizer = weakref.finalize(self, _release_all, self._held)
+
+    def start(self):
+        if self._thread is None:
+            self.started_at = self.clock()
+            self._thread = threading.Thread(target=self._run, name="warmup", daemon=True)
+            self._thread.start()
+        return self
+
+    def wait(self, timeout=None):
+        """True once the warm-up has finished, successfully or not."""
+        return self.ready.wait(timeout)
+
+    @property
+    def ok(self):
+        return self.ready.is_set() and self.error is None
+
+    def mark(self, name):
+        """Records seconds since start() under name (first mark wins)."""
+        if self.started_at is not None and name not in self.marks:
+            self.marks[name] = self.clock() - self.started_at
+        return self.marks.get(name)
+
+    def since(self, start, end):
+        """Seconds between two marks, or None if either is missing."""
+        if start in self.marks and end in self.marks:
+            return self.marks[end] - self.marks[start]
+        return None
+
+    def close(self):
+        """Releases the camera and hand model (also if still warming up)."""
+        self._finalizer()
+
+    def summary(self):
+        return ", ".join(f"{k} {v * 1e3:.0f} ms" for k, v in self.phases.items())
+
+    # ---- background ----
+    def _phase(self, name, fn):
+        t = self.clock()
+        result = fn()
+        self.phases[name] = self.clock() - t
+        return result
+
+    def _run(self):
+        try:
+            self._phase("imports", self._import_all)
+            self.cap = self._hold(self._phase("camera", self._open_camera))
+            if self.make_hands is not None:
+                self.hands = self._hold(self._phase("model", self.make_hands))
+                self._phase("prime", self._prime)
+            self.mark("ready")
+        except Exception as exc:  # surfaced to the page through .error
+            self.error = exc
+        finally:
+            self.ready.set()
+
+    def _hold(self, resource):
+        self._held.append(resource)
+        if not self._finalizer.alive:  # closed while this was opening
+            _release_all(self._held)
+        return resource
+
+    def _import_all(self):
+        for name in self.modules:
+            importlib.import_module(name)
+
+    def _open_camera(self):
+        cap = self.open_capture()
+        if cap is None or not cap.isOpened():
+            if cap is not None:
+                cap.release()
+            raise RuntimeError("Camera could not be opened")
+        for _ in range(self.warm_frames):
+            cap.read()
+        return cap
+
+    def _prime(self):
+        # The first inference builds the graph / spawns the workers; do it
+        # on a blank frame now rather than on the player's first move.
+        import numpy as np
+
+        ok, frame = self.cap.read()
+        shape = frame.shape if ok and frame is not None else (480, 640, 3)
+        self.hands.process(np.zeros(shape, np.uint8))
+
+
+def _release_all(held):
+    """Releases captures (release()) and hand models (close()) in held."""
+    while held:
+        resource = held.pop()
+        try:
+            if hasattr(resource, "release"):
+                resource.release()
+            else:
+                resource.close()
+        except Exception:  # already gone; nothing else to free
+            pass
@@ -0,0 +1,395 @@
+"""Offline benchmark for the game engine — no camera, no Streamlit.
+
+Drives backend.sim.update + backend.render.render (the two halves of
+step_frame, without the sound side effects) with scripted fingertip
+trajectories or with recorded videos run through MediaPipe, and writes
+machine-readable results.
+
+    python bench.py --out bench.json
+    python bench.py --sweep full --frames 600 --out bench.json
+    python bench.py --video clip.mp4 --out bench.json
+    python bench.py --session recordings/game.snkr --out bench.json
+    python bench.py --out new.json --compare bench.json
+    python bench.py --incremental --out inc.json   # draw through the Compositor
+"""
+import argparse
+import itertools
+import json
+import math
+import platform
+import random
+import subprocess
+import sys
+import time
+import tracemalloc
+
+import cv2
+import numpy as np
+
+from backend.sim import init_state, update, tick_delay, scale_obstacles
+from backend.state import FOOD_RADIUS
+from backend.collision import HEAD_RADIUS
+from backend.render import render
+from backend.compositor import Compositor
+from backend.replay import SessionReplay
+from backend.theme import THEMES
+from backend.tracking import (
+    Landmark, HandLandmarks, HandResults, NO_HANDS, fingertip_from_results,
+)
+
+
+# -----------------------------------------------------------
+# SCRIPTED INPUT
+# -----------------------------------------------------------
+def _circle(t):
+    return 0.5 + 0.3 * math.cos(t), 0.5 + 0.3 * math.sin(t)
+
+
+def _figure8(t):
+    return 0.5 + 0.35 * math.sin(t), 0.5 + 0.25 * math.sin(2 * t)
+
+
+def _zigzag(t):
+    return 0.15 + 0.7 * abs((t / 2) % 2 - 1), 0.2 + 0.6 * ((t / 9) % 1)
+
+
+TRAJECTORIES = {"circle": _circle, "figure8": _figure8, "zigzag": _zigzag}
+
+
+def fake_results(x, y):
+    """MediaPipe-shaped results with all 21 landmarks at (x, y)."""
+    lm = Landmark(x, y, 0.0)
+    return HandResults([HandLandmarks([lm] * 21)])
+
+
+def scripted_results(name, frames, dropout=0.0, seed=0):
+    rng = random.Random(seed)
+    path = TRAJECTORIES[name]
+    for i in range(frames):
+        if dropout and rng.random() < dropout:
+            yield NO_HANDS
+        else:
+            yield fake_results(*path(i * 0.03))
+
+
+def video_results(path, frames):
+    """Runs a recorded video through MediaPipe Hands once, keeps the results."""
+    import mediapipe as mp
+
+    cap = cv2.VideoCapture(path)
+    hands = mp.solutions.hands.Hands(max_num_hands=1, min_detection_confidence=0.7,
+                                     min_tracking_confidence=0.7)
+    out = []
+    start = time.perf_counter()
+    while len(out) < frames:
+        ok, frame = cap.read()
+        if not ok:
+            break
+        rgb = cv2.cvtColor(cv2.flip(frame, 1), cv2.COLOR_BGR2RGB)
+        res = hands.process(rgb)
+        out.append(HandResults([
+            HandLandmarks([Landmark(lm.x, lm.y, lm.z) for lm in h.landmark])
+            for h in (res.multi_hand_landmarks or [])
+        ]))
+    inference_fps = len(out) / max(time.perf_counter() - start, 1e-9)
+    cap.release()
+    hands.close()
+    return out, inference_fps
+
+
+def session_result(path, frames):
+    """Replays a recorded session through update + render and times each tick.
+
+    Unlike the scripted scenarios nothing is pinned: the engine sees the
+    exact play that was recorded, so mismatches are reported too.
+    """
+    replay = SessionReplay(path)
+    stop = min(len(replay), frames)
+    state, rng = replay.seek(0)
+    canvas = np.empty((replay.height, replay.width, 3), np.uint8)
+    update_t, draw_t, mismatches = [], [], 0
+    for i in range(stop):
+        t0 = time.perf_counter()
+        ok = replay.tick(state, rng, i)
+        t1 = time.perf_counter()
+        render(canvas, state)
+        t2 = time.perf_counter()
+        update_t.append(t1 - t0)
+        draw_t.append(t2 - t1)
+        mismatches += not ok
+
+    step = np.add(update_t, draw_t)
+    return {
+        "input": path, "resolution": f"{replay.width}x{replay.height}",
+        "theme": replay.theme_name, "length": len(state.snake_body),
+        "level": state.level, "powerups": None,
+        "frames": stop,
+        "fps": stop / max(step.sum(), 1e-9),
+        "step_ms_p50": float(np.percentile(step, 50) * 1e3) if stop else 0.0,
+        "step_ms_p95": float(np.percentile(step, 95) * 1e3) if stop else 0.0,
+        "update_ms_mean": float(np.mean(update_t) * 1e3) if stop else 0.0,
+        "draw_ms_mean": float(np.mean(draw_t) * 1e3) if stop else 0.0,
+        "mismatches": mismatches,
+    }
+
+
+# -----------------------------------------------------------
+# SCENARIOS
+# -----------------------------------------------------------
+def body_layout(width, height, length, spacing=HEAD_RADIUS, margin=40):
+    """length points, head first, snaking up from the bottom of the board.
+
+    Points are `spacing` apart along rows 2 * spacing apart, so the body
+    never touches itself and the head starts clear of it.
+    """
+    per_row = max(int((width - 2 * margin) // spacing), 1)
+    pts = []
+    for i in range(length):
+        row, k = divmod(i, per_row)
+        if row % 2:
+            k = per_row - 1 - k
+        pts.append([margin + k * spacing, height - margin - row * 2 * spacing])
+    return pts[::-1]
+
+
+def make_state(width, height, theme, length, level, powerups, rng):
+    state = init_state(width, height, theme)
+    state.game_started = True
+    grid = state.grid
+    pts = body_layout(width, height, length)
+    body = state.snake_body
+    for p in body:
+        grid.remove(p, body.clearance)
+    body.reset(pts)
+    state.snake_pos[:] = pts[0]
+    pin(state, length, level, powerups)
+    # obstacles as they would be on reaching this level, set up once
+    scale_obstacles(state, rng)
+    if powerups >= 3:
+        state.blue_food_pos = grid.sample_free(rng)
+        state.invisible_food_pos = grid.sample_free(rng)
+        for pos in (state.blue_food_pos, state.invisible_food_pos):
+            if pos is not None:
+                grid.add(pos, FOOD_RADIUS)
+    return state
+
+
+def pin(state, length, level, powerups):
+    # Hold the scenario steady: eating or levelling up would change it.
+    # score sets the body length, level the difficulty; update() only
+    # levels up on points scored that tick, so the two can differ.
+    state.score = length - 3
+    state.level = level
+    if powerups >= 1:
+        state.speed_boost_active = True
+        state.speed_boost_timer = 1e9
+    if powerups >= 2:
+        state.invisible_active = True
+        state.invisible_timer = 1e9
+
+
+def run_scenario(sc, results, measure_alloc=True):
+    rng = random.Random(sc.get("seed", 0))
+    w, h = sc["resolution"]
+    # the pipeline's rotation of canvases, which the compositor has to handle
+    canvases = [np.empty((h, w, 3), np.uint8) for _ in range(3)]
+    compositor = Compositor() if sc.get("renderer") == "incremental" else None
+    draw = compositor.render if compositor is not None else render
+    state = make_state(w, h, sc["theme"], sc["length"], sc["level"], sc["powerups"], rng)
+
+    update_t, draw_t = [], []
+    restarts = 0
+    for i, res in enumerate(results):
+        pin(state, sc["length"], sc["level"], sc["powerups"])
+        fingertip = fingertip_from_results(res, w, h)
+        dt = tick_delay(state)
+
+        t0 = time.perf_counter()
+        update(state, fingertip, dt, rng)
+        t1 = time.perf_counter()
+        draw(canvases[i % 3], state)
+        t2 = time.perf_counter()
+
+        update_t.append(t1 - t0)
+        draw_t.append(t2 - t1)
+        if state.game_over:
+            restarts += 1
+            state = make_state(w, h, sc["theme"], sc["length"], sc["level"], sc["powerups"], rng)
+
+    step = np.add(update_t, draw_t)
+    out = dict(sc)
+    out.update({
+        "resolution": f"{w}x{h}",
+        "frames": len(step),
+        "fps": len(step) / step.sum(),
+        "step_ms_p50": float(np.percentile(step, 50) * 1e3),
+        "step_ms_p95": float(np.percentile(step, 95) * 1e3),
+        "update_ms_mean": float(np.mean(update_t) * 1e3),
+        "draw_ms_mean": float(np.mean(draw_t) * 1e3),
+        "restarts": restarts,
+        # a restart means some frames timed a fresh game instead of this scenario
+        "valid": restarts == 0,
+    })
+    if compositor is not None:
+        out["redrawn_mean"] = compositor.mean_redrawn
+    if measure_alloc:
+        out.update(measure_allocations(sc, results[:min(len(results), 200)]))
+    return out
+
+
+def measure_allocations(sc, results):
+    """Mean bytes allocated and mean transient peak per frame (tracemalloc)."""
+    rng = random.Random(sc.get("seed", 0))
+    w, h = sc["resolution"]
+    canvas = np.empty((h, w, 3), np.uint8)
+    state = make_state(w, h, sc["theme"], sc["length"], sc["level"], sc["powerups"], rng)
+
+    tracemalloc.start()
+    allocated, peaks = 0, 0
+    try:
+        for res in results:
+            pin(state, sc["length"], sc["level"], sc["powerups"])
+            fingertip = fingertip_from_results(res, w, h)
+            before = tracemalloc.take_snapshot()
+            base, _ = tracemalloc.get_traced_memory()
+            tracemalloc.reset_peak()
+            update(state, fingertip, tick_delay(state), rng)
+            render(canvas, state)
+            _, peak = tracemalloc.get_traced_memory()
+            after = tracemalloc.take_snapshot()
+            allocated += sum(s.size_diff for s in after.compare_to(before, "filename") if s.size_diff > 0)
+            peaks += peak - base
+            if state.game_over:
+                state = make_state(w, h, sc["theme"], sc["length"], sc["level"], sc["powerups"], rng)
+    finally:
+        tracemalloc.stop()
+    n = max(len(results), 1)
+    return {"alloc_bytes_per_frame": allocated / n, "peak_bytes_per_frame": peaks / n}
+
+
+BASE = {"resolution": (800, 600), "theme": "Neon", "length": 20, "level": 3,
+        "powerups": 0, "input": "circle"}
+
+AXES = {
+    "resolution": [(640, 480), (800, 600), (1280, 720)],
+    "theme": list(THEMES),
+    "length": [3, 100, 1000],
+    "level": [1, 5, 10],
+    "powerups": [0, 1, 2, 3],
+}
+
+
+def scenarios(sweep):
+    if sweep == "full":
+        keys = list(AXES)
+        for combo in itertools.product(*(AXES[k] for k in keys)):
+            yield dict(BASE, **dict(zip(keys, combo)))
+        return
+    # quick: vary one axis at a time around BASE
+    yield dict(BASE)
+    for key, values in AXES.items():
+        for v in values:
+            if v != BASE[key]:
+                yield dict(BASE, **{key: v})
+
+
+# -----------------------------------------------------------
+# REPORTING
+# -----------------------------------------------------------
+def environment():
+    try:
+        rev = subprocess.run(["git", "rev-parse", "--short", "HEAD"],
+                             capture_output=True, text=True, timeout=5).stdout.strip()
+    except (OSError, subprocess.SubprocessError):
+        rev = ""
+    return {
+        "git": rev,
+        "python": sys.version.split()[0],
+        "numpy": np.__version__,
+        "opencv": cv2.__version__,
+        "platform": platform.platform(),
+        "machine": platform.machine(),
+        "time": time.strftime("%Y-%m-%dT%H:%M:%S"),
+    }
+
+
+def scenario_key(r):
+    key = tuple(str(r.get(k)) for k in ("input", "resolution", "theme", "length", "level", "powerups"))
+    return key + (r.get("renderer", "full"),)
+
+
+def compare(results, baseline_path, tolerance):
+    with open(baseline_path) as f:
+        baseline = {scenario_key(r): r for r in json.load(f)["results"]}
+    regressions = []
+    for r in results:
+        old = baseline.get(scenario_key(r))
+        if old and not (r.get("valid", True) and old.get("valid", True)):
+            print(f"SKIPPED {scenario_key(r)}: game restarted during the run", file=sys.stderr)
+            continue
+        if old and r["fps"] < old["fps"] * (1 - tolerance):
+            regressions.append((scenario_key(r), old["fps"], r["fps"]))
+    for key, old, new in regressions:
+        print(f"REGRESSION {key}: {old:.0f} -> {new:.0f} fps", file=sys.stderr)
+    return regressions
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--sweep", choices=["quick", "full"], default="quick")
+    ap.add_argument("--frames", type=int, default=300)
+    ap.add_argument("--input", choices=list(TRAJECTORIES), default=None,
+                    help="only this scripted trajectory (default: circle)")
+    ap.add_argument("--dropout", type=float, default=0.0, help="fraction of frames without a hand")
+    ap.add_argument("--video", action="append", default=[], help="recorded video to replay (repeatable)")
+    ap.add_argument("--session", action="append", default=[],
+                    help="recorded session to replay (repeatable)")
+    ap.add_argument("--incremental", action="store_true",
+                    help="draw through backend.compositor instead of a full render")
+    ap.add_argument("--no-alloc", action="store_true", help="skip the tracemalloc pass")
+    ap.add_argument("--out", default="bench.json")
+    ap.add_argument("--compare", help="baseline JSON; exit 1 on fps regressions")
+    ap.add_argument("--tolerance", type=float, default=0.10)
+    args = ap.parse_args(argv)
+
+    inputs = {}
+    name = args.input or "circle"
+    inputs[name] = list(scripted_results(name, args.frames, args.dropout))
+    meta_video = {}
+    for path in args.video:
+        inputs[path], meta_video[path] = video_results(path, args.frames)
+
+    results = []
+    for input_name, res in inputs.items():
+        for sc in scenarios(args.sweep):
+            sc["input"] = input_name
+            sc["renderer"] = "incremental" if args.incremental else "full"
+            r = run_scenario(sc, res, measure_alloc=not args.no_alloc)
+            results.append(r)
+            print(f"{r['input']:>10} {r['resolution']:>9} {r['theme']:>6} len={r['length']:<5}"
+                  f" lvl={r['level']:<3} pu={r['powerups']} {r['fps']:8.0f} fps"
+                  f" p95={r['step_ms_p95']:.2f}ms"
+                  + ("" if r["valid"] else f"  INVALID: {r['restarts']} restarts"))
+    for path in args.session:
+        r = session_result(path, args.frames)
+        results.append(r)
+        print(f"{path}: {r['frames']} ticks {r['fps']:8.0f} fps"
+              f" p95={r['step_ms_p95']:.2f}ms mismatches={r['mismatches']}")
+
+    invalid = sum(not r.get("valid", True) for r in results)
+    if invalid:
+        print(f"{invalid} scenario(s) restarted the game and are marked invalid;"
+              " --compare skips them", file=sys.stderr)
+
+    report = {"env": environment(), "video_inference_fps": meta_video, "results": results}
+    with open(args.out, "w") as f:
+        json.dump(report, f, indent=1)
+    print(f"wrote {len(results)} results to {args.out}")
+
+    if args.compare and compare(results, args.compare, args.tolerance):
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
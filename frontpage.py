@@ -1,16 +1,36 @@
 # frontpage.py
 import streamlit as st
-import cv2
-import mediapipe as mp
+import random
 import time
-import numpy as np
+import uuid
+import streamlit.components.v1 as components
 
-from backend.engine import init_state, step_frame
+# cv2, mediapipe, numpy and the backend modules that pull them in are
+# imported where first needed; Warmup loads them in the background while
+# the instructions page is up, so reruns of that page stay cheap.
+from backend.warmup import Warmup
 
 # =========================================================
 # CONFIG
 # =========================================================
 WIDTH, HEIGHT = 800, 600
+CAMERA_SOURCE = 0  # camera index, a video file, an image directory or "synthetic"
+CAPTURE_SIZE, CAPTURE_FPS = (640, 480), 30  # asked of the camera; enough for the tracker
+MODEL_INPUT = (480, 360)  # frames are mirrored + resized + made RGB once, to this size
+INFERENCE_EVERY_N = 2  # run the hand model on every Nth camera frame
+INPUT_FILTER = "one_euro"  # "one_euro", "kalman" or "none"
+INFERENCE_WORKERS = 1  # hand-model processes; 0 runs it in this process
+STREAM_PORT = 8765  # MJPEG endpoint serving the game + camera preview
+PREVIEW_FPS, PREVIEW_SCALE = 10, 0.5  # the preview is encoded from the model input
+SERVER_MODE = False  # share one GameServer (and its hand models) across sessions
+SERVER_MODELS = 2  # hand models shared by all sessions in server mode
+PROFILE_OVERLAY = True  # fps + stage times on the game frame when SNAKE_PROFILE=1
+PROFILE_DUMP_EVERY = 10.0  # seconds between rewrites of SNAKE_PROFILE_DUMP (.json trace / Prometheus)
+SCORES_DB = "scores.db"  # SQLite leaderboard; point every station at one file to share it
+RECORD_DIR = None  # directory for replayable session recordings (backend.replay), or None
+INCREMENTAL_DRAW = True  # redraw / re-encode only the parts of the game frame that changed
+GAME_STRIP = 16  # rows per separately encoded strip of the game stream
+ADAPTIVE_QUALITY = True  # trade preview fps / model input size / particles for tick deadlines
 st.set_page_config(page_title="Jungle Snake Adventure", layout="wide")
 
 # =========================================================
@@ -25,6 +45,221 @@ if "intro_loaded" not in st.session_state:
 if "cap" not in st.session_state:
     st.session_state.cap = None
 
+if "pipeline" not in st.session_state:
+    st.session_state.pipeline = None
+
+if "stream_id" not in st.session_state:
+    st.session_state.stream_id = uuid.uuid4().hex[:8]
+
+
+def open_camera():
+    from backend.capture import open_source, LatestFrameGrabber
+    source = open_source(CAMERA_SOURCE, CAPTURE_SIZE, CAPTURE_FPS)
+    return LatestFrameGrabber(source).start()
+
+
+def make_hands():
+    if INFERENCE_WORKERS > 0:
+        # MediaPipe runs in worker processes, off the script's cores
+        from backend.inference import InferenceService
+        return InferenceService(workers=INFERENCE_WORKERS)
+    import mediapipe as mp
+    # HandTracker does the tracking with its own crops (see backend.tracking)
+    return mp.solutions.hands.Hands(
+        static_image_mode=True,
+        max_num_hands=1,
+        min_detection_confidence=0.7,
+    )
+
+
+if "warmup" not in st.session_state:
+    # Server mode shares the GameServer's models, so only the camera warms up
+    # (an abandoned session's Warmup releases them when it is collected)
+    st.session_state.warmup = Warmup(open_camera, None if SERVER_MODE else make_hands).start()
+
+
+# =========================================================
+# GAME PIPELINE
+# =========================================================
+@st.cache_resource
+def get_stream_server():
+    from backend.stream import FrameStreamServer
+    return FrameStreamServer(port=STREAM_PORT).start()
+
+
+@st.cache_resource
+def get_score_store():
+    from backend.scores import ScoreStore
+    return ScoreStore(SCORES_DB)
+
+
+@st.cache_resource
+def get_game_server():
+    import mediapipe as mp
+    from backend.server import GameServer
+
+    def make_hands():
+        # shared across players, so no cross-frame tracking inside the model
+        return mp.solutions.hands.Hands(
+            static_image_mode=True,
+            max_num_hands=1,
+            min_detection_confidence=0.7,
+        )
+    return GameServer(make_hands, models=SERVER_MODELS, width=WIDTH, height=HEIGHT,
+                      every_n=INFERENCE_EVERY_N, input_filter=INPUT_FILTER,
+                      scores=get_score_store(), incremental=INCREMENTAL_DRAW).start()
+
+
+def join_game_server(cap, theme_name, stream_id, on_first_frame=None, player=""):
+    from backend.engine import post_sounds
+    from backend.frames import FramePrep
+
+    server = get_game_server()
+    stream = get_stream_server()
+    game_channel = f"{stream_id}-game"
+    camera_channel = f"{stream_id}-camera"
+    stream.channel(game_channel, strip=GAME_STRIP if INCREMENTAL_DRAW else None)
+    stream.channel(camera_channel, max_fps=PREVIEW_FPS, scale=PREVIEW_SCALE)
+    sounds = stream.sound_channel(stream_id)
+    prep = FramePrep(MODEL_INPUT)
+    session = None
+
+    def publish(frame, rgb_out, events):
+        if on_first_frame is not None:
+            on_first_frame()
+        compositor = session.compositor if session is not None else None
+        stream.publish(game_channel, rgb_out, compositor.dirty if compositor else None)
+        if frame is not None:
+            stream.publish(camera_channel, frame)
+        post_sounds(sounds, events)
+
+    def read_frame():
+        ret, frame = cap.read()
+        return prep(frame) if ret else None
+
+    session = server.register(stream_id, theme_name, on_frame=publish, player=player)
+    server.attach_capture(stream_id, read_frame, prep.release)
+    return server
+
+
+def start_pipeline(cap, tracker, input_filter, state, theme_name, stream_id,
+                   on_first_frame=None, player=""):
+    import os
+    import numpy as np
+    from backend.engine import step_frame
+    from backend.frames import FramePrep
+    from backend.replay import SessionRecorder
+    from backend.pipeline import GamePipeline
+    from backend.pacer import QualityGovernor
+    from backend.profiling import profiler
+    from backend.compositor import Compositor
+
+    stream = get_stream_server()
+    game_channel = f"{stream_id}-game"
+    camera_channel = f"{stream_id}-camera"
+    stream.channel(game_channel, strip=GAME_STRIP if INCREMENTAL_DRAW else None)
+    # Each game has its own seeded RNG so a recording can replay it exactly
+    seed = random.SystemRandom().getrandbits(63)
+    rng = random.Random(seed)
+    recorder = None
+    if RECORD_DIR:
+        os.makedirs(RECORD_DIR, exist_ok=True)
+        recorder = SessionRecorder(os.path.join(RECORD_DIR, f"{stream_id}-{seed:x}.snkr"),
+                                   state, seed)
+    preview = stream.channel(camera_channel, max_fps=PREVIEW_FPS, scale=PREVIEW_SCALE)
+    sounds = stream.sound_channel(stream_id)
+    scores = get_score_store().player(player)
+
+    def apply_quality(q):
+        preview.set_max_fps(min(q["preview_fps"], PREVIEW_FPS))
+        tracker.detect_width = q["detect_width"]
+        state.particles.set_limit(q["particles"])
+
+    # Camera pixels only ever feed the model and the preview, so they are
+    # prepared once at model size; the game draws on its own canvases.
+    # The tracker detects / crops from there and landmarks come back
+    # normalised, so nothing is resized to WIDTH x HEIGHT.
+    prep = FramePrep(MODEL_INPUT)
+    canvases = [np.empty((HEIGHT, WIDTH, 3), np.uint8) for _ in range(3)]
+    canvas_i = 0
+    compositor = Compositor() if INCREMENTAL_DRAW else None
+
+    def read_frame():
+        with profiler.span("cap.read"):
+            ret, frame = cap.read()
+        if not ret:
+            return None
+        with profiler.span("prep"):
+            return prep(frame)
+
+    def infer(rgb):
+        with profiler.span("hands.process"):
+            return tracker.process(rgb)
+
+    def tick(frame, results, captured_at):
+        nonlocal canvas_i
+        canvas = canvases[canvas_i]
+        canvas_i = (canvas_i + 1) % len(canvases)
+        rgb_out, _, delay = step_frame(
+            canvas, results, state,
+            theme_name=theme_name,
+            width=WIDTH, height=HEIGHT,
+            input_filter=input_filter,
+            captured_at=captured_at,
+            rng=rng,
+            sounds=sounds,
+            recorder=recorder,
+            scores=scores,
+            compositor=compositor,
+        )
+        if PROFILE_OVERLAY and profiler.enabled:
+            rect = profiler.draw_overlay(rgb_out)
+            if compositor is not None:
+                compositor.touch(rgb_out, rect)
+        stream.publish(game_channel, rgb_out, compositor.dirty if compositor else None)
+        stream.publish(camera_channel, frame)
+        if on_first_frame is not None:
+            on_first_frame()
+        return rgb_out, delay
+
+    governor = QualityGovernor(apply_quality) if ADAPTIVE_QUALITY else None
+    pipeline = GamePipeline(read_frame, infer, tick, governor, release=prep.release)
+    pipeline.recorder = recorder
+    pipeline.compositor = compositor
+    return pipeline.start()
+
+
+def stop_game():
+    """Frees what a game holds: pipeline threads (or the GameServer
+    session), camera, hand model, recorder and stream channels. The next run starts over from the
+    instructions page with a fresh warm-up."""
+    from backend.profiling import profiler, DUMP_PATH
+
+    ss = st.session_state
+    pipeline, ss.pipeline = ss.pipeline, None
+    if SERVER_MODE:
+        # the GameServer is shared: only this station leaves it
+        get_game_server().unregister(ss.stream_id)
+    elif pipeline is not None:
+        pipeline.stop()
+        if pipeline.recorder is not None:
+            pipeline.recorder.close()
+    if profiler.enabled and DUMP_PATH:
+        profiler.dump(DUMP_PATH)
+    # the camera and hand model came from the warm-up, which releases them
+    ss.cap = None
+    ss.pop("hands", None)
+    warmup = ss.pop("warmup", None)
+    if warmup is not None:
+        warmup.close()
+
+    stream = get_stream_server()
+    sid = ss.stream_id
+    stream.remove_channel(f"{sid}-game")
+    stream.remove_channel(f"{sid}-camera")
+    stream.remove_sound_channel(sid)
+    ss.page = "instructions"
+
 # =========================================================
 # INTRO EFFECTS (LOAD ONLY ONCE — CRITICAL)
 # =========================================================
@@ -88,9 +323,9 @@ if not st.session_state.intro_loaded:
     # Fireflies & leaves
     fx = ""
     for _ in range(12):
-        fx += f'<div class="firefly" style="left:{np.random.randint(5,95)}%;top:{np.random.randint(5,95)}%;animation-duration:{np.random.uniform(6,14):.1f}s"></div>'
+        fx += f'<div class="firefly" style="left:{random.randrange(5,95)}%;top:{random.randrange(5,95)}%;animation-duration:{random.uniform(6,14):.1f}s"></div>'
     for _ in range(8):
-        fx += f'<div class="leaf" style="left:{np.random.randint(0,100)}%;animation-duration:{np.random.randint(8,18)}s"></div>'
+        fx += f'<div class="leaf" style="left:{random.randrange(0,100)}%;animation-duration:{random.randrange(8,18)}s"></div>'
     st.markdown(fx, unsafe_allow_html=True)
 
     # Ambient audio
@@ -134,26 +369,75 @@ if st.session_state.page == "instructions":
     st.session_state.theme = right_col.selectbox(
         "Theme", ["Neon", "Dark", "Forest", "Fire"], index=0
     )
+    st.session_state.player = right_col.text_input("Player name", max_chars=14).strip()
+
+    top = get_score_store().top(5)
+    if top:
+        right_col.markdown("### 🏆 Top Scores")
+        right_col.markdown("\n".join(
+            f"{i}. **{g.player or 'anonymous'}** — {g.score} (level {g.level})"
+            for i, g in enumerate(top, 1)
+        ))
 
+    warmup = st.session_state.warmup
     if not start:
-        CAMERA_FRAME.markdown("🎬 Waiting to start…")
+        # The camera and model load in the background. wait() blocks this
+        # run until they are ready. A widget change or a START press in the
+        # meantime takes effect on the rerun that follows the wait.
+        status = CAMERA_FRAME.empty()
+        if not warmup.ready.is_set():
+            status.markdown("🎬 Warming up camera and hand model…")
+            warmup.wait()
+        if warmup.error:
+            status.markdown(f"⚠️ Warm-up failed: {warmup.error}")
+        else:
+            status.markdown(f"🎬 Ready — waiting to start… ({warmup.summary()})")
         st.stop()
 
     # INIT GAME
-    st.session_state.cap = cv2.VideoCapture(0, cv2.CAP_DSHOW)
-    for _ in range(3):  # camera warmup
-        st.session_state.cap.read()
-
-    mp_hands = mp.solutions.hands
-    st.session_state.hands = mp_hands.Hands(
-        max_num_hands=1,
-        min_detection_confidence=0.7,
-        min_tracking_confidence=0.7
+    warmup.mark("start")
+    with CAMERA_FRAME, st.spinner("Getting the camera ready…"):
+        warmup.wait()
+    if warmup.error:
+        st.error(f"Camera error: {warmup.error}")
+        st.stop()
+    st.session_state.cap = warmup.cap
+
+    def first_frame():
+        warmup.mark("first_frame")
+
+    if SERVER_MODE:
+        st.session_state.pipeline = join_game_server(
+            st.session_state.cap,
+            st.session_state.theme,
+            st.session_state.stream_id,
+            first_frame,
+            st.session_state.player,
+        )
+        st.session_state.page = "game"
+        st.rerun()
+
+    from backend.engine import init_state
+    from backend.tracking import HandTracker
+    from backend.filters import make_filter
+
+    st.session_state.hands = warmup.hands
+    st.session_state.tracker = HandTracker(
+        st.session_state.hands, every_n=INFERENCE_EVERY_N
     )
 
-    st.session_state.state = init_state(WIDTH, HEIGHT)
+    st.session_state.state = init_state(WIDTH, HEIGHT, st.session_state.theme)
+    st.session_state.pipeline = start_pipeline(
+        st.session_state.cap,
+        st.session_state.tracker,
+        make_filter(INPUT_FILTER),
+        st.session_state.state,
+        st.session_state.theme,
+        st.session_state.stream_id,
+        first_frame,
+        st.session_state.player,
+    )
     st.session_state.page = "game"
-    time.sleep(0.2)
     st.rerun()
 
 # =========================================================
@@ -161,34 +445,62 @@ if st.session_state.page == "instructions":
 # =========================================================
 if st.session_state.page == "game":
 
-    cap = st.session_state.cap
-    hands = st.session_state.hands
-    state = st.session_state.state
-
-    ret, frame = cap.read()
-    if not ret:
-        st.error("Camera error")
-        st.stop()
-
-    frame = cv2.flip(frame, 1)
+    pipeline = st.session_state.pipeline
 
-    with CAMERA_FRAME:
-        st.image(frame, channels="BGR")
-
-    resized = cv2.resize(frame, (WIDTH, HEIGHT))
-    rgb = cv2.cvtColor(resized, cv2.COLOR_BGR2RGB)
-    results = hands.process(rgb)
-
-    rgb_out, state, delay = step_frame(
-        rgb, results, state,
-        theme_name=st.session_state.theme,
-        width=WIDTH, height=HEIGHT
+    # Frames go straight from the render stage to the browser over MJPEG;
+    # the page only embeds the streams once.
+    host = st.context.headers.get("Host", "localhost").split(":")[0]
+    sid = st.session_state.stream_id
+    GAME_FRAME.markdown(
+        f'<img src="{get_stream_server().url(sid + "-game", host)}" style="width:100%">',
+        unsafe_allow_html=True,
+    )
+    CAMERA_FRAME.markdown(
+        f'<img src="{get_stream_server().url(sid + "-camera", host)}" style="width:100%">',
+        unsafe_allow_html=True,
     )
 
-    st.session_state.state = state
-
-    with GAME_FRAME:
-        st.image(rgb_out, channels="RGB")
+    from backend.sounds import player_html
 
-    time.sleep(delay)
-    st.rerun()
+    # One audio player for the whole game: clips are decoded once in the
+    # browser and triggered by the sound events stream.
+    with CAMERA_FRAME:
+        components.html(
+            player_html(get_stream_server().events_url(sid, host),
+                        get_stream_server().clips_url(host)),
+            height=0,
+        )
+
+    from backend.profiling import profiler, DUMP_PATH
+
+    warmup = st.session_state.warmup
+    pacer = getattr(pipeline, "pacer", None)
+    status = GAME_FRAME.empty()
+    dump_profile = profiler.enabled and DUMP_PATH
+    next_dump = time.monotonic() + PROFILE_DUMP_EVERY
+    # Streamlit raises StopException at the next st.* call once the
+    # session ends or the tab reloads, so the finally always runs.
+    try:
+        while pipeline.running:
+            info = []
+            startup = warmup.since("start", "first_frame")
+            if startup is not None:
+                # time-to-first-playable-frame, from the START click
+                info.append(f"first frame {startup * 1e3:.0f} ms after START")
+            if pacer is not None and pacer.ticks:
+                level = pipeline.governor.level if pipeline.governor else 0
+                info.append(f"late ticks {pacer.missed}/{pacer.ticks} · quality -{level}")
+            compositor = getattr(pipeline, "compositor", None)
+            if compositor is not None and compositor.frame:
+                info.append(f"redrawn {compositor.mean_redrawn:.0%} of each frame")
+            if info:
+                status.caption(" · ".join(info))
+            if dump_profile and time.monotonic() >= next_dump:
+                profiler.dump(DUMP_PATH)
+                next_dump += PROFILE_DUMP_EVERY
+            time.sleep(0.5)
+
+        st.error(f"Camera error: {pipeline.error}" if pipeline.error else "Camera error")
+    finally:
+        stop_game()
+    st.stop()
@@ -5,6 +5,8 @@ import random
 import math
 import time
 
+from backend.capture import open_source, LatestFrameGrabber
+
 # ======================
 # Page Config
 # ======================
@@ -73,9 +75,11 @@ if st.session_state.page == "game":
             st.session_state.running = False
             st.experimental_rerun()
 
-    # Open camera once
+    WIDTH, HEIGHT = 640, 480
+
+    # Open camera once, at the size the game draws at
     if st.session_state.cap is None:
-        st.session_state.cap = cv2.VideoCapture(0)
+        st.session_state.cap = LatestFrameGrabber(open_source(0, (WIDTH, HEIGHT))).start()
 
     cap = st.session_state.cap
 
@@ -84,7 +88,6 @@ if st.session_state.page == "game":
     hands = mp_hands.Hands(max_num_hands=1)
     mp_draw = mp.solutions.drawing_utils
 
-    WIDTH, HEIGHT = 640, 480
     frame_area = st.image([])
 
     # ======================
@@ -95,7 +98,8 @@ if st.session_state.page == "game":
         st.error("Camera not working")
         st.stop()
 
-    frame = cv2.resize(frame, (WIDTH, HEIGHT))
+    if frame.shape[:2] != (HEIGHT, WIDTH):  # the camera would not do it natively
+        frame = cv2.resize(frame, (WIDTH, HEIGHT))
     rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
 
     results = hands.process(rgb)
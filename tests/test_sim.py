@@ -0,0 +1,31 @@
+import random
+
+import pytest
+
+from backend.sim import init_state, update, tick_delay, tick_smoothing
+
+
+def straight_run(px_per_tick, ticks=100, length=13):
+    """Moves the head right at a steady speed; returns the tick the game ended, or None."""
+    state = init_state(800, 600)
+    state.game_started = True
+    state.score = length - 3  # the body grows to score + 3 segments
+    state.level = 1 + state.score // 5
+    # nothing but the snake on the board
+    for ox, oy, r in state.obstacles:
+        state.grid.remove((ox, oy), r + 10)
+    state.obstacles = state.obstacles[:0]
+    state.obstacle_vel = state.obstacle_vel[:0]
+    rng = random.Random(0)
+    for i in range(ticks):
+        x, y = state.snake_pos
+        update(state, (x + px_per_tick / tick_smoothing(state), y), tick_delay(state), rng)
+        if state.game_over:
+            return i
+    return None
+
+
+@pytest.mark.parametrize("speed", [2.6, 3.0, 3.2, 4.0, 6.0])
+def test_straight_run_never_hits_itself(speed):
+    ticks = int(600 / speed)  # stop short of the right wall
+    assert straight_run(speed, ticks) is None